@@ -0,0 +1,61 @@
+"""
+Match parse time against the number of included resources in a 5-match /matches page.
+
+Both columns time the same full build of every :class:`pybattlerite.models.Match` in a page.
+"parse (scan)" looks every included resource up with a linear scan of the list, as the old
+`_get_object` did, "parse (index)" uses the index clients build once per response.
+
+Run from the repository root::
+
+    python benchmarks/bench_included.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import match_page  # noqa: E402
+from pybattlerite.models import Match, _index_included  # noqa: E402
+
+
+class ScannedIncluded(dict):
+    """
+    The included list, looked up by linear scan. Models take any dict as an already built index,
+    so this runs the unchanged build path with the old lookups.
+    """
+    def __init__(self, included):
+        super().__init__()
+        self.included = included
+
+    def get(self, _id, default=None):
+        for item in self.included:
+            if item['id'] == _id:
+                return item
+        return default
+
+    def __getitem__(self, _id):
+        item = self.get(_id)
+        if item is None:
+            raise KeyError(_id)
+        return item
+
+
+def parse(page, index):
+    included = index(page['included'])
+    return [Match(match, included) for match in page['data']]
+
+
+def main(number=50):
+    print("{:>9} {:>16} {:>16}".format('included', 'parse (scan) ms', 'parse (index) ms'))
+    for extra in (0, 100, 500, 2000, 10000):
+        page = match_page(extra=extra)
+        assert [m.rosters[0].participants[0].id for m in parse(page, ScannedIncluded)] == \
+               [m.rosters[0].participants[0].id for m in parse(page, _index_included)]
+        before = timeit.timeit(lambda: parse(page, ScannedIncluded), number=number) / number
+        after = timeit.timeit(lambda: parse(page, _index_included), number=number) / number
+        print("{:>9} {:>16.3f} {:>16.3f}".format(len(page['included']), before * 1000, after * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Decode time of the available JSON backends on real-sized payloads.
+
+Install orjson and/or ujson to include them, the fastest installed one is what clients use
+by default. Run from the repository root::
+
+    python benchmarks/bench_json.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import DATA_DIR, match_page, player, telemetry  # noqa: E402
+from pybattlerite.utils import JSON_BACKENDS  # noqa: E402
+
+
+def payloads():
+    with open(os.path.join(DATA_DIR, 'stackables.json'), 'rb') as f:
+        stackables = f.read()
+    return [
+        ('players (6)', json.dumps({'data': [player() for _ in range(6)]}).encode()),
+        ('matches page (5)', json.dumps(match_page(5)).encode()),
+        ('matches page (25)', json.dumps(match_page(25)).encode()),
+        ('telemetry (5k events)', json.dumps(telemetry(5000)).encode()),
+        ('telemetry (50k events)', json.dumps(telemetry(50000)).encode()),
+        ('stackables.json', stackables),
+    ]
+
+
+def main(budget=0.5):
+    backends = list(JSON_BACKENDS)
+    print("{:<24} {:>9}".format('payload', 'KiB') + ''.join(' {:>12}'.format(name + ' ms') for name in backends))
+    for name, blob in payloads():
+        row = "{:<24} {:>9.1f}".format(name, len(blob) / 1024)
+        for backend in backends:
+            loads = JSON_BACKENDS[backend]
+            once = timeit.timeit(lambda: loads(blob), number=1)
+            number = max(1, int(budget / max(once, 1e-6)))
+            elapsed = min(timeit.repeat(lambda: loads(blob), number=number, repeat=3)) / number
+            row += ' {:>12.3f}'.format(elapsed * 1000)
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
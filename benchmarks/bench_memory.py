@@ -0,0 +1,72 @@
+"""
+Memory kept alive by built matches, in bytes per match, and their pickled size.
+
+Pickled size is measured two ways: per match in one pickle of the whole list, where shared
+objects are written once, and per match pickled on its own, as when caching a match or sending
+it back from a worker process.
+
+Each page is decoded from its own JSON body, so strings aren't shared between matches any more
+than they would be in a real crawl. Only what is still referenced once the decoded documents
+are dropped is counted, which includes the raw data a lazy match holds on to. Run from the
+repository root::
+
+    python benchmarks/bench_memory.py --matches 20000
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import match_page  # noqa: E402
+from pybattlerite.clientbase import parse_matches  # noqa: E402
+from pybattlerite.models import LazyMatch, Match  # noqa: E402
+from pybattlerite.utils import json_loads  # noqa: E402
+
+
+def retained(match_cls, bodies, touch=False):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    matches = []
+    for body in bodies:
+        matches.extend(parse_matches(match_cls, json_loads, body)[1])
+    if touch:
+        for match in matches:
+            match.rosters, match.rounds, match.spectators, match.created_at
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(matches), matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes retained per built match.")
+    parser.add_argument('--matches', type=int, default=10000)
+    parser.add_argument('--page-size', type=int, default=25)
+    parser.add_argument('--team-size', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = max(1, args.matches // args.page_size)
+    bodies = [json.dumps(match_page(args.page_size, args.team_size, args.rounds)).encode() for _ in range(pages)]
+    print("{} matches, {}v{}, {} rounds, {:.0f} bytes of JSON per match".format(
+        pages * args.page_size, args.team_size, args.team_size, args.rounds,
+        sum(map(len, bodies)) / (pages * args.page_size)))
+
+    for name, match_cls, touch in (('Match', Match, False), ('LazyMatch', LazyMatch, False),
+                                   ('LazyMatch, decoded', LazyMatch, True)):
+        per_match, matches = retained(match_cls, bodies, touch)
+        together = len(pickle.dumps(matches, pickle.HIGHEST_PROTOCOL)) / len(matches)
+        alone = sum(len(pickle.dumps(match, pickle.HIGHEST_PROTOCOL)) for match in matches) / len(matches)
+        print("{:<20} {:>9.0f} bytes/match resident {:>9.0f} pickled in a list {:>9.0f} pickled alone".format(
+            name, per_match, together, alone))
+        del matches
+
+
+if __name__ == '__main__':
+    main()
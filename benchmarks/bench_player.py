@@ -0,0 +1,64 @@
+"""
+Per-Player construction cost, before and after the shared stackable index.
+
+Run from the repository root::
+
+    python benchmarks/bench_player.py
+"""
+import copy
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pybattlerite.models import Player  # noqa: E402
+from pybattlerite.utils import StackableFinder, LocParser  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pybattlerite', 'data')
+
+
+def make_player(n_stats=120):
+    ids = [item['StackableId'] for item in StackableFinder.shared().data['Mappings']]
+    step = max(1, len(ids) // n_stats)
+    stats = {str(_id): i for i, _id in enumerate(ids[::step][:n_stats])}
+    stats['picture'] = 39003
+    stats['title'] = 60025
+    return {'type': 'player', 'id': '934791968557563904',
+            'attributes': {'name': 'bench', 'patchVersion': '', 'shardId': 'global', 'stats': stats}}
+
+
+def legacy_player(data, lang='English'):
+    # What Player.__init__ did before: reload stackables.json, reparse the language's ini
+    # and scan the mappings for every key
+    with open(os.path.join(DATA_DIR, 'stackables.json')) as f:
+        mappings = json.load(f)['Mappings']
+    parser = LocParser()
+    with open(os.path.join(DATA_DIR, 'localization', '{}.ini'.format(lang))) as fp:
+        parser.read_file(fp)
+    loc = parser.to_dict()['Loc']
+    stats = {}
+    for key, value in data['attributes']['stats'].items():
+        if key in ('picture', 'title'):
+            continue
+        for item in mappings:
+            if item['StackableId'] == int(key):
+                name = loc[item['LocalizedName']] if item['LocalizedName'] else item['DevName']
+                stats[key] = {'localized_name': name, 'xp': value}
+                break
+    return stats
+
+
+def main(number=20):
+    doc = make_player()
+    before = timeit.timeit(lambda: legacy_player(copy.deepcopy(doc)), number=number) / number
+    after = timeit.timeit(lambda: Player(copy.deepcopy(doc)), number=number) / number
+    print("stats per player: {}".format(len(doc['attributes']['stats']) - 2))
+    print("before: {:8.2f} ms / Player".format(before * 1000))
+    print("after:  {:8.2f} ms / Player".format(after * 1000))
+    print("speedup: {:.1f}x".format(before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+A local stand-in for the Battlerite API serving synthetic or recorded JSON:API documents.
+
+Serves `/status`, `/shards/global/matches`, `/shards/global/matches/{id}`, `/shards/global/players`,
+`/shards/global/players/{id}`, `/shards/global/teams` and `/telemetry.json`. Responses are
+serialized once at startup so the server stays out of the way of the client being measured.
+
+Recorded responses can be served instead of the synthetic ones by passing a directory holding
+any of `status.json`, `matches.json`, `match.json`, `players.json`, `player.json`, `teams.json`
+and `telemetry.json`.
+
+Run it on its own from the repository root::
+
+    python benchmarks/fakeapi.py --port 8000 --latency 0.01
+
+and point a client at it::
+
+    client.base_url = 'http://127.0.0.1:8000/shards/global/'
+    client.status_url = 'http://127.0.0.1:8000/status'
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle would hold the body back for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        api = self.server.api
+        api.hits += 1
+        if api.latency:
+            time.sleep(api.latency)
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        status, body = api.respond(url.path, query)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeAPI:
+    """
+    A fake Battlerite API on a background thread, use :meth:`spawn` to run it in its own process
+    so it doesn't compete with the client for the GIL.
+
+    Parameters
+    ----------
+    host : str
+    port : int
+        0 picks a free port.
+    latency : float
+        Seconds every response is delayed by.
+    total_matches : int
+        Matches /matches pages through before returning 404.
+    telemetry_events : int
+        Events in the telemetry document.
+    recorded : Optional[str]
+        Directory of recorded responses to serve instead of synthetic ones.
+    """
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, total_matches=1000, telemetry_events=5000,
+                 recorded=None):
+        self.latency = latency
+        self.total_matches = total_matches
+        self.hits = 0
+        self._server = _Server((host, port), _Handler)
+        self._server.api = self
+        self._thread = None
+        self.url = 'http://{}:{}/'.format(*self._server.server_address)
+        self._load(telemetry_events, recorded)
+
+    @property
+    def base_url(self):
+        return self.url + 'shards/global/'
+
+    @property
+    def status_url(self):
+        return self.url + 'status'
+
+    def point(self, client):
+        """
+        Send a client's requests to this server.
+        """
+        client.base_url = self.base_url
+        client.status_url = self.status_url
+        return client
+
+    def _load(self, telemetry_events, recorded):
+        def document(name, build):
+            path = os.path.join(recorded, name) if recorded else None
+            if path and os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+            return build()
+
+        telemetry_url = self.url + 'telemetry.json'
+        self.status = json.dumps(document('status.json', lambda: {
+            'data': {'type': 'status', 'id': 'gamelocker',
+                     'attributes': {'releasedAt': '2018-01-09T21:56:33Z', 'version': 'fake'}}})).encode()
+        page = document('matches.json', lambda: fixtures.match_page(telemetry_url=telemetry_url))
+        page.pop('links', None)
+        self.page = page
+        self.page_bodies = {}
+        self.match = json.dumps(document('match.json', lambda: fixtures.match_document(
+            telemetry_url=telemetry_url))).encode()
+        players = document('players.json', lambda: {'data': [fixtures.player()]})['data']
+        # Served players get the requested ids, their attributes are serialized once
+        self.player_attributes = json.dumps(players[0]['attributes'])
+        self.player = json.dumps(document('player.json', lambda: {'data': fixtures.player()})).encode()
+        self.teams = json.dumps(document('teams.json', lambda: {
+            'data': [fixtures.team() for _ in range(3)]})).encode()
+        self.telemetry = json.dumps(document('telemetry.json', lambda: fixtures.telemetry(telemetry_events))).encode()
+        self.not_found = json.dumps({'errors': [{'title': 'Not Found'}]}).encode()
+
+    def _page(self, offset, limit):
+        # The page is the same at every offset, only the links and the number of matches change
+        count = max(0, min(limit, self.total_matches - offset))
+        if not count:
+            return 404, self.not_found
+        if count not in self.page_bodies:
+            page = dict(self.page, data=(self.page['data'] * (count // len(self.page['data']) + 1))[:count])
+            self.page_bodies[count] = json.dumps(page).encode()
+        links = {'self': '{}matches?page[offset]={}&page[limit]={}'.format(self.base_url, offset, limit)}
+        if offset + limit < self.total_matches:
+            links['next'] = '{}matches?page[offset]={}&page[limit]={}'.format(self.base_url, offset + limit, limit)
+        return 200, '{{"links": {}, '.format(json.dumps(links)).encode() + self.page_bodies[count][1:]
+
+    def respond(self, path, query):
+        """
+        Returns
+        -------
+        tuple(int, bytes)
+            The status and body served for a request.
+        """
+        if path == '/status':
+            return 200, self.status
+        if path == '/telemetry.json':
+            return 200, self.telemetry
+        if not path.startswith('/shards/global/'):
+            return 404, self.not_found
+        parts = path[len('/shards/global/'):].strip('/').split('/')
+        if parts[0] == 'matches':
+            if len(parts) > 1:
+                return 200, self.match
+            return self._page(int(query.get('page[offset]', 0)), int(query.get('page[limit]', 5)))
+        if parts[0] == 'players':
+            if len(parts) > 1:
+                return 200, self.player
+            ids = [i for key in ('filter[playerIds]', 'filter[playerNames]', 'filter[steamIds]')
+                   for i in query.get(key, '').split(',') if i]
+            data = ','.join('{{"type": "player", "id": {}, "attributes": {}}}'.format(json.dumps(i),
+                                                                                    self.player_attributes)
+                            for i in ids)
+            return 200, '{{"data": [{}]}}'.format(data).encode()
+        if parts[0] == 'teams':
+            return 200, self.teams
+        return 404, self.not_found
+
+    def start(self):
+        """
+        Serve on a daemon thread, returns the server.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @staticmethod
+    def spawn(latency=0.0, total_matches=1000, telemetry_events=5000, recorded=None):
+        """
+        Run a server in a child process.
+
+        Returns
+        -------
+        tuple(subprocess.Popen, str)
+            The process, terminate it when done, and the server's root url.
+        """
+        args = [sys.executable, os.path.abspath(__file__), '--latency', str(latency),
+                '--total-matches', str(total_matches), '--telemetry-events', str(telemetry_events)]
+        if recorded:
+            args += ['--recorded', recorded]
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, universal_newlines=True)
+        return proc, proc.stdout.readline().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds every response is delayed by")
+    parser.add_argument('--total-matches', type=int, default=1000)
+    parser.add_argument('--telemetry-events', type=int, default=5000)
+    parser.add_argument('--recorded', help="directory of recorded responses")
+    args = parser.parse_args()
+    api = FakeAPI(args.host, args.port, args.latency, args.total_matches, args.telemetry_events, args.recorded)
+    # The first line is the url, FakeAPI.spawn reads it
+    print(api.url, flush=True)
+    try:
+        api._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Synthetic JSON:API documents shaped like the Battlerite API's responses.
+"""
+import itertools
+import json
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pybattlerite', 'data')
+TELEMETRY_URL = 'https://cdn.gamelockerapp.com/telemetry.json'
+
+_ids = itertools.count(1)
+_stackable_ids = []
+
+
+def _id():
+    return str(next(_ids))
+
+
+def participant(player_id=None):
+    data = {
+        'type': 'participant', 'id': _id(),
+        'attributes': {
+            'actor': 12,
+            'shardId': 'global',
+            'stats': {'attachment': 1, 'emote': 2, 'mount': 3, 'outfit': 4, 'side': 1, 'abilityUses': 120,
+                      'damageDone': 2400, 'damageReceived': 1800, 'deaths': 2, 'disablesDone': 14,
+                      'disablesReceived': 9, 'energyGained': 300, 'energyUsed': 250, 'healingDone': 900,
+                      'healingReceived': 700, 'kills': 3, 'score': 80, 'timeAlive': 310, 'userID': '1234'}
+        }
+    }
+    if player_id is not None:
+        data['relationships'] = {'player': {'data': {'type': 'player', 'id': player_id}}}
+    return data
+
+
+def match_page(matches=5, team_size=3, rounds=3, extra=0, telemetry_url=TELEMETRY_URL):
+    """
+    Build a /matches response with `matches` matches and `extra` unrelated included resources.
+    """
+    data = []
+    included = []
+    for _ in range(matches):
+        rosters = []
+        for side in range(2):
+            parts = [participant(_id()) for _ in range(team_size)]
+            included.extend(parts)
+            roster = {'type': 'roster', 'id': _id(),
+                      'attributes': {'shardId': 'global', 'stats': {'score': 3}, 'won': 'true' if side else 'false'},
+                      'relationships': {'participants': {'data': [{'type': 'participant', 'id': p['id']}
+                                                                  for p in parts]}}}
+            included.append(roster)
+            rosters.append(roster)
+        rounds_ = [{'type': 'round', 'id': _id(),
+                    'attributes': {'duration': 60, 'ordinal': i, 'stats': {'winningTeam': i % 2 + 1}}}
+                   for i in range(rounds)]
+        included.extend(rounds_)
+        asset = {'type': 'asset', 'id': _id(),
+                 'attributes': {'URL': telemetry_url, 'name': 'telemetry'}}
+        included.append(asset)
+        data.append({
+            'type': 'match', 'id': _id(),
+            'attributes': {'createdAt': '2018-01-09T21:56:33Z', 'duration': 420, 'gameMode': '1733162751',
+                           'patchVersion': '2.10', 'shardId': 'global',
+                           'stats': {'mapID': '1609d7fb', 'type': 'QUICK3V3'}},
+            'relationships': {
+                'rosters': {'data': [{'type': 'roster', 'id': r['id']} for r in rosters]},
+                'rounds': {'data': [{'type': 'round', 'id': r['id']} for r in rounds_]},
+                'spectators': {'data': []},
+                'assets': {'data': [{'type': 'asset', 'id': asset['id']}]}
+            }
+        })
+    # Unrelated resources go first so lookups have to walk past them, as they would in a big page
+    included[:0] = [{'type': 'player', 'id': _id(), 'attributes': {}} for _ in range(extra)]
+    return {'data': data, 'included': included,
+            'links': {'self': 'https://api.dc01.gamelockerapp.com/shards/global/matches?page[offset]=0',
+                      'next': 'https://api.dc01.gamelockerapp.com/shards/global/matches?page[offset]=5'}}
+
+
+def match_document(**kwargs):
+    """
+    Build a /matches/{id} response, `kwargs` are passed to :func:`match_page`.
+    """
+    page = match_page(matches=1, **kwargs)
+    return {'data': page['data'][0], 'included': page['included']}
+
+
+def player(n_stats=120, name='bench'):
+    """
+    Build a player resource with `n_stats` stats keyed by real stackable ids.
+    """
+    if not _stackable_ids:
+        with open(os.path.join(DATA_DIR, 'stackables.json'), encoding='utf-8') as f:
+            _stackable_ids.extend(item['StackableId'] for item in json.load(f)['Mappings'])
+    step = max(1, len(_stackable_ids) // n_stats)
+    stats = {str(_id): i for i, _id in enumerate(_stackable_ids[::step][:n_stats])}
+    stats['picture'] = 39003
+    stats['title'] = 60025
+    return {'type': 'player', 'id': _id(),
+            'attributes': {'name': name, 'patchVersion': '', 'shardId': 'global', 'stats': stats}}
+
+
+def team(members=3):
+    return {'type': 'team', 'id': _id(),
+            'attributes': {'name': 'bench', 'shardId': 'global',
+                           'stats': {'avatar': 39003, 'division': 2, 'divisionRating': 54, 'league': 4, 'losses': 21,
+                                     'members': [_id() for _ in range(members)], 'placementGamesLeft': 0,
+                                     'topDivision': 1, 'topDivisionRating': 80, 'topLeague': 4, 'wins': 34}}}
+
+
+def telemetry(events=5000, match_id='bench'):
+    """
+    Build a telemetry document of `events` events, mostly spell and death events like real telemetry.
+    """
+    out = [{'type': 'Structures.MatchStart', 'cursor': 0,
+            'dataObject': {'time': 0, 'matchID': match_id, 'mapID': '1609d7fb', 'type': 'QUICK3V3',
+                           'teamSize': 3, 'region': 'eu'}}]
+    for cursor in range(1, events):
+        if cursor % 4:
+            event = {'type': 'Structures.UserRoundSpell',
+                     'dataObject': {'time': cursor * 50, 'matchID': match_id, 'accountId': str(cursor % 6),
+                                    'round': cursor % 3 + 1, 'character': 12, 'type': 'damage',
+                                    'value': cursor * 1.5}}
+        else:
+            event = {'type': 'Structures.DeathEvent',
+                     'dataObject': {'time': cursor * 50, 'matchID': match_id, 'userID': str(cursor % 6),
+                                    'killers': [str((cursor + 1) % 6)]}}
+        event['cursor'] = cursor
+        out.append(event)
+    return out
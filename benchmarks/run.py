@@ -0,0 +1,243 @@
+"""
+End-to-end and parsing benchmarks for both clients against a local fake API.
+
+Starts :mod:`fakeapi` in a child process, measures throughput and latency percentiles of
+:class:`pybattlerite.Client` and :class:`pybattlerite.AsyncClient` per endpoint at several
+concurrency levels, then the cost of building models from decoded responses. Results are
+written as JSON, pass an earlier result file to `--compare` to print the change against it.
+
+Run from the repository root::
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --quick --compare results.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fixtures  # noqa: E402
+from fakeapi import FakeAPI  # noqa: E402
+from pybattlerite import AsyncClient, Client  # noqa: E402
+from pybattlerite.clientbase import ClientBase  # noqa: E402
+from pybattlerite.models import Match, Player, Team, _index_included  # noqa: E402
+from pybattlerite.telemetry import TelemetryParser, parse_event  # noqa: E402
+
+SCENARIOS = ['status', 'match', 'matches', 'players', 'teams', 'telemetry']
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(client, scenario, concurrency, latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda value: None if value is None else round(value * 1000, 3)  # noqa: E731
+    return {'client': client, 'scenario': scenario, 'concurrency': concurrency,
+            'requests': len(latencies) + errors, 'errors': errors, 'elapsed': round(elapsed, 4),
+            'throughput': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'latency_ms': {'mean': ms(sum(ordered) / len(ordered)) if ordered else None,
+                           'p50': ms(percentile(ordered, 0.5)), 'p90': ms(percentile(ordered, 0.9)),
+                           'p99': ms(percentile(ordered, 0.99)), 'max': ms(ordered[-1] if ordered else None)}}
+
+
+def calls(client, match):
+    # The async client's methods return coroutines, so the same table works for both
+    return {
+        'status': client.get_status,
+        'match': lambda: client.match_by_id('1'),
+        'matches': lambda: client.get_matches(limit=5),
+        'players': lambda: client.get_players(playerids=[1, 2, 3, 4, 5, 6]),
+        'teams': lambda: client.get_teams(playerids=[1, 2, 3], season=8),
+        'telemetry': lambda: client.get_telemetry(match),
+    }
+
+
+def bench_sync(url, scenarios, levels, requests):
+    results = []
+    for concurrency in levels:
+        client = Client('bench', pool_size=max(100, concurrency))
+        client.base_url = url + 'shards/global/'
+        client.status_url = url + 'status'
+        table = calls(client, client.match_by_id('1'))
+
+        def timed(call):
+            started = time.perf_counter()
+            try:
+                call()
+            except Exception:
+                return None
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for scenario in scenarios:
+                call = table[scenario]
+                count = requests if scenario != 'telemetry' else max(concurrency, requests // 10)
+                list(pool.map(lambda _: timed(call), range(concurrency)))  # warm up the connections
+                started = time.perf_counter()
+                timings = list(pool.map(lambda _: timed(call), range(count)))
+                elapsed = time.perf_counter() - started
+                latencies = [t for t in timings if t is not None]
+                results.append(summarize('sync', scenario, concurrency, latencies, count - len(latencies), elapsed))
+                report(results[-1])
+        client.session.close()
+    return results
+
+
+async def _bench_async(url, scenarios, levels, requests):
+    results = []
+    for concurrency in levels:
+        client = AsyncClient('bench', pool_size=max(200, concurrency))
+        client.base_url = url + 'shards/global/'
+        client.status_url = url + 'status'
+        table = calls(client, await client.match_by_id('1'))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(call):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await call()
+                except Exception:
+                    return None
+                return time.perf_counter() - started
+
+        for scenario in scenarios:
+            call = table[scenario]
+            count = requests if scenario != 'telemetry' else max(concurrency, requests // 10)
+            await asyncio.gather(*[timed(call) for _ in range(concurrency)])
+            started = time.perf_counter()
+            timings = await asyncio.gather(*[timed(call) for _ in range(count)])
+            elapsed = time.perf_counter() - started
+            latencies = [t for t in timings if t is not None]
+            results.append(summarize('async', scenario, concurrency, latencies, count - len(latencies), elapsed))
+            report(results[-1])
+        await client.session.close()
+    return results
+
+
+def bench_async(url, scenarios, levels, requests):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_bench_async(url, scenarios, levels, requests))
+    finally:
+        loop.close()
+
+
+def bench_parse(number):
+    """
+    Per-operation cost of building models from already decoded responses.
+    """
+    client = ClientBase()
+    client.match_cls = Match
+    client.hooks = []
+    page = fixtures.match_page()
+    document = fixtures.match_document()
+    player = fixtures.player()
+    teams = [fixtures.team() for _ in range(10)]
+    telemetry = json.dumps(fixtures.telemetry(5000)).encode()
+
+    def parse_telemetry():
+        parser = TelemetryParser()
+        events = [parse_event(event) for event in parser.feed(telemetry)]
+        parser.close()
+        return events
+
+    cases = {
+        'match_page (5 matches)': lambda: client.build_matches(page),
+        'match_document': lambda: Match(document['data'], _index_included(document['included'])),
+        'player (120 stats)': lambda: Player(player),
+        'teams (10)': lambda: [Team(team) for team in teams],
+        'telemetry (5000 events)': parse_telemetry,
+    }
+    results = {}
+    for name, case in cases.items():
+        case()
+        runs = max(1, number // 50) if 'telemetry' in name else number
+        elapsed = min(timeit.repeat(case, number=runs, repeat=3)) / runs
+        results[name] = {'per_op_ms': round(elapsed * 1000, 4), 'ops_per_second': round(1 / elapsed, 1)}
+        print("parse  {:<26} {:>10.4f} ms".format(name, elapsed * 1000))
+    return results
+
+
+def report(result):
+    latency = result['latency_ms']
+    print("{client:<6} {scenario:<10} c={concurrency:<4} {throughput:>9} req/s  p50={p50} p90={p90} p99={p99} ms"
+          "  errors={errors}".format(p50=latency['p50'], p90=latency['p90'], p99=latency['p99'], **result))
+
+
+def compare(results, path):
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['client'], r['scenario'], r['concurrency']): r for r in baseline.get('http', [])}
+    print("\nAgainst {}:".format(path))
+    for r in results['http']:
+        before = old.get((r['client'], r['scenario'], r['concurrency']))
+        if before and before['throughput'] and r['throughput']:
+            print("{client:<6} {scenario:<10} c={concurrency:<4} throughput x{0:.2f}  p50 x{1:.2f}".format(
+                r['throughput'] / before['throughput'],
+                (r['latency_ms']['p50'] or 0) / (before['latency_ms']['p50'] or 1), **r))
+    for name, r in results['parse'].items():
+        before = baseline.get('parse', {}).get(name)
+        if before:
+            print("parse  {:<26} x{:.2f} time".format(name, r['per_op_ms'] / before['per_op_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pybattlerite against a local fake API.")
+    parser.add_argument('--output', default='benchmark-results.json', help="where to write the results")
+    parser.add_argument('--compare', help="an earlier results file to compare against")
+    parser.add_argument('--concurrency', default='1,8,32,128', help="comma separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=400, help="requests per scenario and level")
+    parser.add_argument('--latency', type=float, default=0.005, help="simulated server latency in seconds")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--clients', default='sync,async')
+    parser.add_argument('--parse-number', type=int, default=500, help="iterations of each parse benchmark")
+    parser.add_argument('--recorded', help="directory of recorded API responses for the fake API to serve")
+    parser.add_argument('--quick', action='store_true', help="fewer requests and levels, for a smoke run")
+    args = parser.parse_args()
+    if args.quick:
+        # Only shrink what wasn't set explicitly
+        for name, value in (('concurrency', '1,16'), ('requests', 50), ('parse_number', 50)):
+            if getattr(args, name) == parser.get_default(name):
+                setattr(args, name, value)
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    scenarios = args.scenarios.split(',')
+    clients = args.clients.split(',')
+    proc, url = FakeAPI.spawn(latency=args.latency, recorded=args.recorded)
+    try:
+        results = {
+            'meta': {'time': datetime.datetime.utcnow().isoformat() + 'Z', 'python': platform.python_version(),
+                     'implementation': platform.python_implementation(), 'platform': platform.platform(),
+                     'latency': args.latency, 'requests': args.requests, 'concurrency': levels},
+            'http': [],
+        }
+        if 'sync' in clients:
+            results['http'] += bench_sync(url, scenarios, levels, args.requests)
+        if 'async' in clients:
+            results['http'] += bench_async(url, scenarios, levels, args.requests)
+    finally:
+        proc.terminate()
+        proc.wait()
+    results['parse'] = bench_parse(args.parse_number)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print("\nWrote {}".format(args.output))
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
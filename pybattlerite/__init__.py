@@ -1,2 +1,3 @@
 from .asyncclient import AsyncClient
 from .client import Client
+from .utils import preload
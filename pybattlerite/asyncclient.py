@@ -1,9 +1,18 @@
 import asyncio
 import aiohttp
-
-from .clientbase import ClientBase
-from .models import Player, AsyncMatch, AsyncMatchPaginator, Team
+import datetime
+import functools
+import time
+
+from .backfill import AsyncBackfill
+from .clientbase import ClientBase, parse_matches
+from .models import Player, AsyncMatch, LazyAsyncMatch, AsyncMatchPaginator, AsyncMatchPrefetcher, AsyncMatchStream, Team
+from .ratelimit import RateLimiter
+from .utils import get_json_loads
+from .retry import RetryPolicy
+from .instrument import BuildEvent, RequestEvent, RetryEvent, trace_config
 from .errors import BRRequestException
+from .errors import BRConnectionException
 from .errors import NotFoundException
 from .errors import BRServerException
 from .errors import EmptyResponseException
@@ -25,38 +34,210 @@ class AsyncClient(ClientBase):
         Currently available languages are:\n
         `Brazilian, English, French, German, Italian, Japanese, Korean,
         Polish, Romanian, Russian, SChinese, Spanish, Turkish.`
+    lazy : bool, Default[False]
+        Return :class:`pybattlerite.models.LazyAsyncMatch` objects, which only decode rosters, rounds,
+        spectators and `created_at` when they are first accessed.
+    coalesce : bool, Default[False]
+        Share one request and its parsed response between coroutines that make the same request
+        while it is in flight.
+    cache : Optional[:class:`pybattlerite.cache.CacheBase`]
+        Cache responses in this cache, e.g. a :class:`pybattlerite.cache.MemoryCache` or
+        :class:`pybattlerite.cache.SQLiteCache`. Responses are never modified by the client,
+        don't modify them yourself when a cache is in use. Lookups and writes of caches that
+        block, like :class:`pybattlerite.cache.SQLiteCache`, run on the loop's default executor.
+    cache_ttls : Optional[dict]
+        Overrides for :attr:`pybattlerite.clientbase.ClientBase.cache_ttls`, seconds to cache each endpoint
+        for, 0 to never cache it and `None` to cache it until evicted.
+    telemetry_store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+        Store used by :meth:`get_telemetry` to keep downloaded telemetry on disk.
+    rate_limiter : Optional[:class:`pybattlerite.ratelimit.RateLimiter`]
+        Limiter pacing this client's API requests, pass one instance to several clients to share
+        a key's budget. By default each client gets its own limiter driven by the API's rate limit headers.
+    retry : Optional[:class:`pybattlerite.retry.RetryPolicy`]
+        How failed requests are retried, defaults to a :class:`pybattlerite.retry.RetryPolicy` with its
+        default settings. Pass `RetryPolicy(max_attempts=1)` to never retry.
+    pool_size : int, Default[200]
+        Most connections open at once, requests beyond it wait for a free connection.
+    per_host : Optional[int]
+        Most connections open at once to a single host, defaults to `pool_size`.
+    dns_ttl : Optional[float], Default[300]
+        Seconds to cache DNS lookups for, `None` to cache them forever.
+    keepalive : float, Default[30]
+        Seconds idle connections are kept open for reuse.
+    timeout : tuple(float, float), Default[(5, 30)]
+        Connect and socket read timeouts in seconds, `None` to wait forever.
+    compress : bool, Default[True]
+        Ask for gzip or deflate compressed responses, `False` asks for uncompressed ones.
+    json_loads : Optional[str or callable]
+        JSON decoder for API responses and telemetry, `'orjson'`, `'ujson'`, `'json'` or a function.
+        Defaults to the fastest installed one, see :func:`pybattlerite.utils.get_json_loads`.
+    executor : Optional[concurrent.futures.Executor]
+        Decode /matches pages and build their matches on this thread or process pool instead of
+        the event loop. Pages that are cached or coalesced are still built on the loop. With a
+        process pool, `json_loads` and the match class must be picklable, which the defaults are.
+
+    Everything but `compress` configures the session created when `session` is omitted.
     """
-    def __init__(self, key, session: aiohttp.ClientSession=None, lang: str='English'):
+    match_cls = AsyncMatch
+
+    def __init__(self, key, session: aiohttp.ClientSession=None, lang: str='English', lazy: bool=False,
+                 coalesce: bool=False, cache=None, cache_ttls: dict=None,
+                 telemetry_store=None, rate_limiter=None, retry=None,
+                 pool_size: int=200, per_host: int=None, dns_ttl: float=300, keepalive: float=30.0,
+                 timeout: tuple=(5.0, 30.0), compress: bool=True, json_loads=None, executor=None):
         if lang in self.avl_langs:
             self.lang = lang
         else:
             raise Exception('{0} is not an available language.\nAs of now only'
                             'these languages are available:{1}'.format(lang, ', '.join(self.avl_langs)))
-        self.session = session or aiohttp.ClientSession()
+        if lazy:
+            self.match_cls = LazyAsyncMatch
+        if session is None:
+            connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=per_host or pool_size,
+                                             ttl_dns_cache=dns_ttl, use_dns_cache=True,
+                                             keepalive_timeout=keepalive)
+            connect, read = timeout or (None, None)
+            session = aiohttp.ClientSession(connector=connector,
+                                            timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+                                            trace_configs=[trace_config()])
+        self.session = session
         self.base_url = "https://api.dc01.gamelockerapp.com/shards/global/"
         self.status_url = "https://api.dc01.gamelockerapp.com/status"
         self.headers = {
             'Authorization': 'Bearer {}'.format(key),
             'Accept': 'application/json'
         }
+        self.headers['Accept-Encoding'] = 'gzip, deflate' if compress else 'identity'
+        self.coalesce = coalesce
+        self.cache = cache
+        self.cache_ttls = dict(self.cache_ttls, **(cache_ttls or {}))
+        self.telemetry_store = telemetry_store
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.hooks = []
+        self.json_loads = get_json_loads(json_loads)
+        self.executor = executor
+        self._inflight = {}
 
     async def gen_req(self, url, params=None, session=None):
+        key = self.request_key(url, params)
+        ttl = 0 if self.cache is None else self.cache_ttl(url)
+        if ttl != 0:
+            resp = await self._cached(self.cache.get, key)
+            if resp is not None:
+                return resp
+        if self.coalesce:
+            resp = await self._coalesced(key, url, params, session)
+        else:
+            resp = await self._request(url, params, session)
+        if ttl != 0:
+            await self._cached(self.cache.set, key, resp, ttl)
+        return resp
+
+    async def _cached(self, method, *args):
+        # Caches doing disk I/O run on the default executor, never on the event loop
+        if self.cache.blocking:
+            return await asyncio.get_event_loop().run_in_executor(None, functools.partial(method, *args))
+        return method(*args)
+
+    async def _coalesced(self, key, url, params, session):
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = self._inflight[key] = asyncio.ensure_future(self._request(url, params, session))
+            flight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller being cancelled doesn't cancel the request for everyone else
+        return await asyncio.shield(flight)
+
+    async def _request(self, url, params=None, session=None, parse=None):
         sess = session or self.session
-        async with sess.get(url, headers=self.headers,
-                            params=params) as req:
+        event = RequestEvent(url, self.endpoint(url), params)
+        began = time.perf_counter()
+        started = time.monotonic()
+        attempt = throttled = 0
+        while True:
+            waited = time.perf_counter()
+            await self.rate_limiter.acquire_async()
+            sent = time.perf_counter()
+            event.queue += sent - waited
+            event.attempts += 1
+            req = error = None
             try:
-                resp = await req.json()
-            except (asyncio.TimeoutError, aiohttp.ClientResponseError):
-                raise BRRequestException(req, {})
-
-            if 300 > req.status >= 200:
-                return resp
+                req = await sess.get(url, headers=self.headers, params=params, trace_request_ctx=event)
+                event.ttfb = time.perf_counter() - sent
+                body = await req.read()
+                event.download = time.perf_counter() - sent - event.ttfb
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                if req is not None:
+                    req.release()
+                error = e
+                delay = self.retry.retry_delay(attempt, started, error=e)
+                if delay is None:
+                    event.error = BRConnectionException(e)
+                    self._finish(event, began)
+                    raise event.error from e
+            else:
+                self.rate_limiter.update(req.headers)
+                if req.status == 429 and throttled < self.rate_limiter.max_throttled:
+                    throttled += 1
+                    self.rate_limiter.throttle(req.headers)
+                    req.release()
+                    continue
+                delay = self.retry.retry_delay(attempt, started, status=req.status)
+                if delay is None:
+                    break
+                req.release()
+            if self.hooks:
+                self.emit(RetryEvent(url, event.endpoint, attempt + 2, delay,
+                                     None if error else req.status, error))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        built = None
+        async with req:
+            decoding = time.perf_counter()
+            try:
+                if parse is not None and 300 > req.status >= 200:
+                    links, matches, decoded, built = await asyncio.get_event_loop().run_in_executor(
+                        self.executor, parse, body)
+                    resp = links, matches
+                else:
+                    resp = self.json_loads(body)
+            except ValueError:
+                resp = None
+            event.decode = decoded if built is not None else time.perf_counter() - decoding
+            event.status = req.status
+            event.bytes = len(body)
+
+            if resp is not None and 300 > req.status >= 200:
+                error = None
             elif req.status == 404:
-                raise NotFoundException(req, resp)
-            elif req.status > 500:
-                raise BRServerException(req, resp)
+                error = NotFoundException(req, resp or {})
+            elif req.status > 500 or resp is None:
+                error = BRServerException(req, resp or {})
             else:
-                raise BRRequestException(req, resp)
+                error = BRRequestException(req, resp)
+        event.error = error
+        self._finish(event, began)
+        if error is not None:
+            raise error
+        if built is not None and self.hooks:
+            self.emit(BuildEvent('Match', len(resp[1]), built))
+        return resp
+
+    async def fetch_matches(self, url, params=None, session=None):
+        """
+        Request a page of /matches and build its matches, on :attr:`executor` if the client has one.
+
+        Returns
+        -------
+        tuple(dict, list(:class:`pybattlerite.models.AsyncMatch`))
+            The page's `links` and its matches.
+        """
+        if self.executor is None or self.coalesce or (self.cache is not None and self.cache_ttl(url) != 0):
+            return self._page(await self.gen_req(url, params, session))
+        # Only the body goes to the executor and only built matches come back
+        return await self._request(url, params, session,
+                                   functools.partial(parse_matches, self.match_cls, self.json_loads))
 
     async def get_status(self):
         """
@@ -83,7 +264,42 @@ class AsyncClient(ClientBase):
             A match object representing the requested match.
         """
         data = await self.gen_req("{0}matches/{1}".format(self.base_url, match_id))
-        return AsyncMatch(data, self.session)
+        started = time.perf_counter()
+        match = self.match_cls(data)
+        self._built('Match', started, 1)
+        return match
+
+    async def get_telemetry(self, match):
+        """
+        Get telemetry data for a match with this client's session, through its telemetry store if it has one.
+
+        Parameters
+        ----------
+        match : :class:`pybattlerite.models.AsyncMatch`
+
+        Returns
+        -------
+        `dict`
+            Match telemetry data
+        """
+        return await match.get_telemetry(self.session, self.telemetry_store, self.json_loads)
+
+    def iter_telemetry(self, match, types: list=None):
+        """
+        Stream a match's telemetry events with this client's session, through its telemetry store if it has one.
+
+        Parameters
+        ----------
+        match : :class:`pybattlerite.models.AsyncMatch`
+        types : Optional[list(str)]
+            Only yield events of these types, e.g. `'Structures.DeathEvent'`.
+
+        Returns
+        -------
+        :class:`pybattlerite.telemetry.AsyncTelemetryStream`
+            An async iterator of telemetry events, each a `dict`.
+        """
+        return match.iter_telemetry(self.session, types, self.telemetry_store)
 
     async def get_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
                           server_type: list=None, ranking_type: list=None, patch_version: list=None):
@@ -122,11 +338,134 @@ class AsyncClient(ClientBase):
         params = self.prepare_match_params(offset, limit, after, before, playerids, server_type, ranking_type,
                                            patch_version)
 
-        data = await self.gen_req("{}matches".format(self.base_url), params=params)
-        matches = []
-        for match in data['data']:
-            matches.append(AsyncMatch(match, self.session, data['included']))
-        return AsyncMatchPaginator(matches, data['links'], self)
+        links, matches = await self.fetch_matches("{}matches".format(self.base_url), params=params)
+        return AsyncMatchPaginator(matches, links, self)
+
+    def prefetch_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
+                         server_type: list=None, ranking_type: list=None, patch_version: list=None,
+                         prefetch: int=4, concurrency: int=4):
+        """
+        Iterate over every match of a /matches query, fetching later pages ahead of the consumer.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+
+        Parameters
+        ----------
+        offset : Optional[int]
+            The nth number of match to start from.
+        limit : Optional[int]
+            Number of matches per page, 5 if omitted.
+        after : Optional[str or datetime.datetime_]
+            Filter to return matches after provided time period, if an str is provided it should follow the **iso8601** format.
+        before :  Optional[str or datetime.datetime_]
+            Filter to return matches before provided time period, if an str is provided it should follow the **iso8601** format.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+        prefetch : int, Default[4]
+            How many pages to keep requested ahead of the page being consumed.
+        concurrency : int, Default[4]
+            Maximum number of page requests in flight at once.
+
+        Returns
+        -------
+        :class:`pybattlerite.models.AsyncMatchPrefetcher`
+            An async iterator yielding :class:`pybattlerite.models.AsyncMatch` objects in order.
+        """
+        params = self.prepare_match_params(offset, limit, after, before, playerids, server_type, ranking_type,
+                                           patch_version)
+        return AsyncMatchPrefetcher(self, params, prefetch, concurrency)
+
+    def iter_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
+                     server_type: list=None, ranking_type: list=None, patch_version: list=None, cursor: str=None):
+        """
+        Stream every match of a /matches query one at a time, following each page's next link.
+
+        Only one page is held in memory at a time, the returned stream's `offset` can be saved and
+        passed back as `offset` to resume later.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+
+        Parameters
+        ----------
+        offset : Optional[int]
+            The nth number of match to start from.
+        limit : Optional[int]
+            Number of matches per page, 5 if omitted.
+        after : Optional[str or datetime.datetime_]
+            Filter to return matches after provided time period, if an str is provided it should follow the **iso8601** format.
+        before :  Optional[str or datetime.datetime_]
+            Filter to return matches before provided time period, if an str is provided it should follow the **iso8601** format.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+        cursor : Optional[str]
+            A saved `next_url` of a previous stream to resume from, the filters are ignored when this is given.
+
+        Returns
+        -------
+        :class:`pybattlerite.models.AsyncMatchStream`
+            An async iterator yielding :class:`pybattlerite.models.AsyncMatch` objects.
+        """
+        params = {} if cursor else self.prepare_match_params(offset, limit, after, before, playerids, server_type,
+                                                             ranking_type, patch_version)
+        return AsyncMatchStream(self, params, cursor)
+
+    def backfill(self, after, before, windows: int=8, concurrency: int=4, split_after: int=500,
+                 min_window: datetime.timedelta=datetime.timedelta(minutes=5), limit: int=None,
+                 playerids: list=None, server_type: list=None, ranking_type: list=None, patch_version: list=None):
+        """
+        Crawl every match in `[after, before)` by splitting the range into windows crawled in parallel.
+
+        Dense windows are split further as they are found and matches are deduplicated by id,
+        see :class:`pybattlerite.backfill.BackfillBase`. Matches are not yielded in time order.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+        .. _datetime.timedelta: https://docs.python.org/3.6/library/datetime.html#timedelta-objects
+
+        Parameters
+        ----------
+        after : str or datetime.datetime_
+            Start of the range, if an str is provided it should follow the **iso8601** format.
+        before : str or datetime.datetime_
+            End of the range, if an str is provided it should follow the **iso8601** format.
+        windows : int, Default[8]
+            Number of windows the range is split into up front.
+        concurrency : int, Default[4]
+            How many windows are crawled at once.
+        split_after : int, Default[500]
+            Number of matches after which a window that still has more is split in two.
+        min_window : datetime.timedelta_, Default[5 minutes]
+            Windows are never split below this length.
+        limit : Optional[int]
+            Number of matches per page.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+
+        Returns
+        -------
+        :class:`pybattlerite.backfill.AsyncBackfill`
+            An async iterator yielding :class:`pybattlerite.models.AsyncMatch` objects, with throughput in its `stats`.
+        """
+        return AsyncBackfill(self, after, before, windows, concurrency, split_after, min_window, limit=limit,
+                             playerids=playerids, server_type=server_type, ranking_type=ranking_type,
+                             patch_version=patch_version)
 
     async def player_by_id(self, player_id: int):
         """
@@ -142,7 +481,10 @@ class AsyncClient(ClientBase):
             A Player object representing the requested player.
         """
         data = await self.gen_req("{0}players/{1}".format(self.base_url, player_id))
-        return Player(data['data'], self.lang)
+        started = time.perf_counter()
+        player = Player(data['data'], self.lang)
+        self._built('Player', started, 1)
+        return player
 
     async def _players(self, playerids: list=None, steamids: list=None, usernames: list=None, single=False):
         params = self.prepare_players_params(playerids, steamids, usernames)
@@ -150,10 +492,13 @@ class AsyncClient(ClientBase):
         data = await self.gen_req("{0}players".format(self.base_url), params=params)
         if len(data['data']) == 0:
             raise EmptyResponseException("No Players with the specified criteria were found.")
+        started = time.perf_counter()
         if not single:
-            return [Player(player, self.lang) for player in data['data']]
+            players = [Player(player, self.lang) for player in data['data']]
         else:
-            return Player(data['data'][0], self.lang)
+            players = Player(data['data'][0], self.lang)
+        self._built('Player', started, 1 if single else len(players))
+        return players
 
     async def get_players(self, playerids: list=None, steamids: list=None, usernames: list=None):
         """
@@ -181,6 +526,48 @@ class AsyncClient(ClientBase):
         """
         return await self._players(playerids, steamids, usernames)
 
+    async def get_players_bulk(self, playerids: list=None, steamids: list=None, usernames: list=None,
+                               concurrency: int=4):
+        """
+        Get any number of players' info, batching the lookup into requests of 6 ids each.
+
+        .. _here: https://developer.valvesoftware.com/wiki/SteamID
+
+        Parameters
+        ----------
+        playerids : Optional[list]
+            A list of playerids, either a `list` of strs or a `list` of ints.
+        steamids : Optional[list]
+            A list of steamids, a `list` of ints, this accepts only `SteamID64` specification, check here_ for more
+            details.
+            Players found by steamid can't be matched back to their ids, so a request of 6 that only finds
+            some of them is repeated one id at a time to tell which are missing.
+        usernames : Optional[list]
+            A list of usernames, a `list` of strings, case insensitive.
+        concurrency : int, Default[4]
+            Maximum number of requests in flight at once.
+
+        Returns
+        -------
+        tuple(players: list, missing: list)
+            The :class:`pybattlerite.models.Player` objects that were found, in input order, and the ids or
+            names that weren't. No :class:`pybattlerite.errors.EmptyResponseException` is raised for misses.
+        """
+        chunks = self.prepare_bulk_players_params(playerids, steamids, usernames)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(params):
+            async with semaphore:
+                data = await self.gen_req("{0}players".format(self.base_url), params=params)
+            return data['data']
+
+        results = await asyncio.gather(*[fetch(params) for _, _, params in chunks])
+        chunks, results = self.split_partial_steamids(chunks, results)
+        retries = [i for i, data in enumerate(results) if data is None]
+        for i, data in zip(retries, await asyncio.gather(*[fetch(chunks[i][2]) for i in retries])):
+            results[i] = data
+        return self.merge_bulk_players(chunks, results)
+
     async def player_by_name(self, username):
         """
         Get a player's info by their ingame name.
@@ -216,5 +603,8 @@ class AsyncClient(ClientBase):
         """
         params = self.prepare_teams_params(playerids, season)
         data = await self.gen_req("{0}teams".format(self.base_url), params=params)
-        return [Team(team) for team in data['data']]
+        started = time.perf_counter()
+        teams = [Team(team) for team in data['data']]
+        self._built('Team', started, len(teams))
+        return teams
 
@@ -0,0 +1,309 @@
+import asyncio
+import copy
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .errors import BRFilterException
+from .ratelimit import RateLimiter
+from .utils import as_utc, parse_iso
+
+
+def _to_datetime(value, name):
+    if isinstance(value, datetime.datetime):
+        return as_utc(value)
+    try:
+        return parse_iso(value)
+    except (TypeError, ValueError):
+        raise BRFilterException("'{}' should be a 'datetime.datetime' or a str following the 'iso8601' format "
+                                "'%Y-%m-%dT%H:%M:%SZ'".format(name))
+
+
+def _splittable(after, before, min_window):
+    return before - after >= min_window * 2
+
+
+def split_window(after, before, parts):
+    """
+    Split `[after, before)` into `parts` equal sub-windows.
+
+    .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+
+    Parameters
+    ----------
+    after : str or datetime.datetime_
+    before : str or datetime.datetime_
+    parts : int
+
+    Returns
+    -------
+    list(tuple(datetime.datetime_, datetime.datetime_))
+        Consecutive `(after, before)` windows covering the whole range.
+
+    Raises
+    ------
+    ValueError
+        `parts` is less than 1.
+    """
+    if parts < 1:
+        raise ValueError("'parts' must be at least 1, got {}".format(parts))
+    after = _to_datetime(after, 'after')
+    before = _to_datetime(before, 'before')
+    if before <= after:
+        raise BRFilterException("'after' must occur at a time before 'before'")
+    step = (before - after) / parts
+    edges = [after + step * i for i in range(parts)] + [before]
+    return [(edges[i], edges[i + 1]) for i in range(parts) if edges[i] < edges[i + 1]]
+
+
+class BackfillStats:
+    """
+    Progress of a backfill.
+
+    Attributes
+    ----------
+    matches : int
+        Unique matches yielded so far.
+    duplicates : int
+        Matches dropped because they were already yielded from another window.
+    windows : int
+        Windows crawled to completion.
+    splits : int
+        Windows that turned out to be dense and were split in two.
+    elapsed : float
+        Seconds since the backfill started.
+    """
+    __slots__ = ['matches', 'duplicates', 'windows', 'splits', 'started', 'finished']
+
+    def __init__(self):
+        self.matches = 0
+        self.duplicates = 0
+        self.windows = 0
+        self.splits = 0
+        self.started = None
+        self.finished = None
+
+    def __repr__(self):
+        return "<BackfillStats: matches={0.matches} windows={0.windows} splits={0.splits} " \
+               "rate={0.matches_per_second:.1f}/s>".format(self)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def matches_per_second(self):
+        elapsed = self.elapsed
+        return self.matches / elapsed if elapsed else 0.0
+
+
+class BackfillBase:
+    """
+    Shared state for :class:`AsyncBackfill` and :class:`Backfill`.
+
+    `[after, before)` is cut into `windows` sub-windows that are crawled concurrently. A window
+    that still has matches left after `split_after` of them is considered dense. What is left of
+    it, from the last match crawled on, is crawled as two new windows. If the halves would be
+    shorter than `min_window`, the window is crawled to its end instead. The API returns matches
+    oldest first, so nothing already crawled is requested again except matches in the same second
+    as the last one. Matches are deduplicated by id, so those and matches at window boundaries
+    are never yielded twice. Matches are yielded in the order windows produce them, not by time.
+    """
+    def __init__(self, client, after, before, windows=8, split_after=500, min_window=datetime.timedelta(minutes=5),
+                 **filters):
+        filters.pop('offset', None)
+        self.client = client
+        self.filters = filters
+        self.windows = split_window(after, before, windows)
+        self.split_after = split_after
+        self.min_window = min_window
+        self.stats = BackfillStats()
+        self.seen = set()
+
+    def __repr__(self):
+        return "<{}: {!r}>".format(type(self).__name__, self.stats)
+
+    def _splittable(self, after, before):
+        return _splittable(after, before, self.min_window)
+
+    def _split(self, after, before):
+        self.stats.splits += 1
+        middle = after + (before - after) / 2
+        return [(after, middle), (middle, before)]
+
+    def _unique(self, match):
+        if match.id in self.seen:
+            self.stats.duplicates += 1
+            return False
+        self.seen.add(match.id)
+        self.stats.matches += 1
+        return True
+
+
+class AsyncBackfill(BackfillBase):
+    """
+    Async iterator that backfills matches from a time range with `concurrency` windows in flight.
+
+    Returned by :meth:`pybattlerite.AsyncClient.backfill`, see :class:`BackfillBase` for how
+    windows are split. Progress and throughput are in :attr:`stats`.
+    """
+    def __init__(self, client, after, before, windows=8, concurrency=4, split_after=500,
+                 min_window=datetime.timedelta(minutes=5), **filters):
+        super().__init__(client, after, before, windows, split_after, min_window, **filters)
+        self.concurrency = concurrency
+        self._queue = None
+        self._out = None
+        self._tasks = []
+
+    def _start(self):
+        self.stats.started = time.monotonic()
+        self._queue = asyncio.Queue()
+        self._out = asyncio.Queue(maxsize=self.split_after)
+        for window in self.windows:
+            self._queue.put_nowait(window)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.ensure_future(self._supervise()))
+
+    async def _supervise(self):
+        await self._queue.join()
+        await self._out.put(None)
+
+    async def _worker(self):
+        while True:
+            after, before = await self._queue.get()
+            try:
+                count = 0
+                last = after
+                async for match in self.client.iter_matches(after=after, before=before, **self.filters):
+                    if count >= self.split_after and self._splittable(last, before):
+                        # Only what is left of the window is crawled again, split in two
+                        for window in self._split(last, before):
+                            self._queue.put_nowait(window)
+                        break
+                    count += 1
+                    last = match.created_at
+                    await self._out.put(match)
+                else:
+                    self.stats.windows += 1
+            except Exception as e:
+                await self._out.put(e)
+            finally:
+                self._queue.task_done()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._queue is None:
+            self._start()
+        while True:
+            item = await self._out.get()
+            if item is None:
+                self._out.put_nowait(None)
+                await self.close()
+                raise StopAsyncIteration
+            if isinstance(item, Exception):
+                await self.close()
+                raise item
+            if self._unique(item):
+                return item
+
+    async def close(self):
+        """
+        Stop every window still being crawled.
+        """
+        if self.stats.finished is None and self.stats.started is not None:
+            self.stats.finished = time.monotonic()
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# The client of a worker process, a pool only ever crawls for one Backfill
+_window_client = None
+
+
+def _crawl_window(spec, after, before, split_after, min_window, filters):
+    # Runs in a worker process, builds a client from the parent's settings once and reuses it
+    global _window_client
+    if _window_client is None:
+        from .client import Client
+
+        rate_limiter = RateLimiter(*spec['rate']) if spec['rate'] else None
+        _window_client = Client('', lang=spec['lang'], retry=spec['retry'], rate_limiter=rate_limiter)
+        _window_client.headers = spec['headers']
+        _window_client.base_url = spec['base_url']
+        _window_client.match_cls = spec['match_cls']
+    matches = []
+    last = after
+    for match in _window_client.iter_matches(after=after, before=before, **filters):
+        if len(matches) >= split_after and _splittable(last, before, min_window):
+            return matches, last
+        last = match.created_at
+        matches.append(match)
+    return matches, None
+
+
+class Backfill(BackfillBase):
+    """
+    Iterator that backfills matches from a time range, crawling windows on a pool of `processes`
+    worker processes so page requests and match parsing both run in parallel.
+
+    Returned by :meth:`pybattlerite.Client.backfill`, see :class:`BackfillBase` for how windows
+    are split. Progress and throughput are in :attr:`stats`. Each window's matches are handed
+    back to this process at once, when its crawl finishes.
+
+    Every worker process has a rate limiter of its own. A fixed rate set on the client's limiter
+    is split evenly between them, so together they stay within it. A limiter sized from response
+    headers can't be split: each worker then learns the key's remaining budget from the API on
+    its own, and may run into 429s that it waits out.
+    """
+    def __init__(self, client, after, before, windows=8, processes=None, split_after=500,
+                 min_window=datetime.timedelta(minutes=5), **filters):
+        super().__init__(client, after, before, windows, split_after, min_window, **filters)
+        self.processes = processes
+
+    def __iter__(self):
+        # Hooks can't be sent to the workers, their retries aren't reported
+        retry = copy.copy(self.client.retry)
+        retry.on_retry = None
+        processes = self.processes or os.cpu_count() or 1
+        limiter = self.client.rate_limiter
+        # A fixed rate is shared out between the workers, (rate, per, max_throttled) for each of them
+        rate = (limiter.capacity / processes, limiter.period, limiter.max_throttled) if limiter.fixed else None
+        spec = {'headers': self.client.headers, 'base_url': self.client.base_url, 'lang': self.client.lang,
+                'match_cls': self.client.match_cls, 'retry': retry, 'rate': rate}
+        self.stats.started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            def submit(window):
+                future = pool.submit(_crawl_window, spec, window[0], window[1], self.split_after,
+                                     self.min_window, self.filters)
+                pending[future] = window
+
+            pending = {}
+            for window in self.windows:
+                submit(window)
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        window = pending.pop(future)
+                        matches, resume = future.result()
+                        if resume is not None:
+                            # Only what is left of the window is crawled again, split in two
+                            for half in self._split(resume, window[1]):
+                                submit(half)
+                        else:
+                            self.stats.windows += 1
+                        for match in matches:
+                            if self._unique(match):
+                                yield match
+            finally:
+                for future in pending:
+                    future.cancel()
+                self.stats.finished = time.monotonic()
@@ -0,0 +1,195 @@
+import collections
+import json
+import sqlite3
+import threading
+import time
+
+from .utils import json_loads
+
+
+class CacheBase:
+    """
+    Base class for response caches, see :class:`MemoryCache` and :class:`SQLiteCache`.
+
+    Subclasses implement :meth:`_get`, :meth:`_set` and :meth:`_len`, which are called with the
+    cache's lock held, hit, miss and eviction counting is done here. Subclasses that do disk or
+    network I/O set :attr:`blocking` so async clients call them off the event loop.
+
+    Attributes
+    ----------
+    hits : int
+        Lookups that were answered from the cache.
+    misses : int
+        Lookups that found nothing or an expired entry.
+    evictions : int
+        Entries dropped to stay within `maxsize`.
+    blocking : bool
+        Whether lookups and writes block on I/O.
+    """
+    blocking = False
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<{0}: size={1[size]} hits={1[hits]} misses={1[misses]}>".format(type(self).__name__, self.stats())
+
+    def get(self, key):
+        """
+        Return the cached value for `key`, or `None` if there is no fresh one.
+        """
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache `value` under `key` for `ttl` seconds, or until evicted if `ttl` is `None`.
+        """
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._set(key, value, expires)
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            `size`, `hits`, `misses` and `evictions`.
+        """
+        with self._lock:
+            return {'size': self._len(), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _get(self, key, now):
+        raise NotImplementedError
+
+    def _set(self, key, value, expires):
+        raise NotImplementedError
+
+    def _len(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        with self._lock:
+            return self._len()
+
+
+class MemoryCache(CacheBase):
+    """
+    An in-memory LRU cache holding at most `maxsize` responses.
+
+    Cached responses are handed out as they are, don't modify them.
+
+    Parameters
+    ----------
+    maxsize : int, Default[1024]
+        Maximum number of responses to keep.
+    """
+    def __init__(self, maxsize=1024):
+        super().__init__(maxsize)
+        self._entries = collections.OrderedDict()
+
+    def _get(self, key, now):
+        try:
+            expires, value = self._entries[key]
+        except KeyError:
+            return None
+        if expires is not None and expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _len(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(CacheBase):
+    """
+    An on-disk LRU cache in a sqlite database, holding at most `maxsize` responses.
+
+    Responses survive restarts and the file can be shared by several processes. Async clients
+    read and write it on their loop's default executor.
+
+    To keep reads from turning into writes, an entry's last use is only updated once it is more
+    than :attr:`touch_after` seconds old, so recency is tracked to that resolution. The size is
+    checked every `maxsize // 64` inserts, at most every 256, rather than counting the table on
+    each one, so the cache can briefly hold that many responses over `maxsize`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the database file, it is created if it doesn't exist.
+    maxsize : int, Default[100000]
+        Maximum number of responses to keep.
+    """
+    blocking = True
+    touch_after = 60.0
+
+    def __init__(self, path, maxsize=100000):
+        super().__init__(maxsize)
+        self.path = path
+        self._evict_every = max(1, min(256, maxsize // 64))
+        self._inserts = 0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "expires REAL, used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key, separators=(',', ':'))
+
+    def _get(self, key, now):
+        key = self._key(key)
+        row = self._db.execute("SELECT value, expires, used FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        if now - row[2] > self.touch_after:
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        return json_loads(row[0])
+
+    def _set(self, key, value, expires):
+        self._db.execute("INSERT OR REPLACE INTO responses (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                         (self._key(key), json.dumps(value, separators=(',', ':')), expires, time.time()))
+        self._inserts += 1
+        if self._inserts < self._evict_every:
+            return
+        self._inserts = 0
+        excess = self._len() - self.maxsize
+        if excess > 0:
+            self._db.execute("DELETE FROM responses WHERE key IN "
+                             "(SELECT key FROM responses ORDER BY used LIMIT ?)", (excess,))
+            self.evictions += excess
+
+    def _len(self):
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        self._db.close()
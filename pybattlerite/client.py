@@ -1,13 +1,48 @@
+import datetime
 import requests
-
-from .clientbase import ClientBase
-from .models import Player, Match, MatchPaginator, Team
+from requests.adapters import HTTPAdapter
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .backfill import Backfill
+from .clientbase import ClientBase, Flight
+from .models import Player, Match, LazyMatch, MatchPaginator, MatchPrefetcher, MatchStream, Team
+from .ratelimit import RateLimiter
+from .utils import get_json_loads
+from .retry import RetryPolicy
+from .instrument import RequestEvent, RetryEvent
 from .errors import BRRequestException
+from .errors import BRConnectionException
 from .errors import NotFoundException
 from .errors import BRServerException
 from .errors import EmptyResponseException
 
 
+class PooledSession(requests.Session):
+    """
+    A :class:`requests.Session` with a larger connection pool and a default timeout, used by
+    :class:`Client` when no session is passed.
+
+    Parameters
+    ----------
+    pool_size : int, Default[100]
+        Connections kept open per host.
+    timeout : tuple(float, float), Default[(5, 30)]
+        Connect and read timeouts for requests made without an explicit `timeout`.
+    """
+    def __init__(self, pool_size: int=100, timeout: tuple=(5.0, 30.0)):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
 class Client(ClientBase):
     """
     Top level class for user to interact with the API.
@@ -24,39 +59,186 @@ class Client(ClientBase):
         Currently available languages are:\n
         `Brazilian, English, French, German, Italian, Japanese, Korean,
         Polish, Romanian, Russian, SChinese, Spanish, Turkish.`
+    lazy : bool, Default[False]
+        Return :class:`pybattlerite.models.LazyMatch` objects, which only decode rosters, rounds,
+        spectators and `created_at` when they are first accessed.
+    coalesce : bool, Default[False]
+        Share one request and its parsed response between threads that make the same request
+        while it is in flight.
+    cache : Optional[:class:`pybattlerite.cache.CacheBase`]
+        Cache responses in this cache, e.g. a :class:`pybattlerite.cache.MemoryCache` or
+        :class:`pybattlerite.cache.SQLiteCache`. Responses are never modified by the client,
+        don't modify them yourself when a cache is in use.
+    cache_ttls : Optional[dict]
+        Overrides for :attr:`pybattlerite.clientbase.ClientBase.cache_ttls`, seconds to cache each endpoint
+        for, 0 to never cache it and `None` to cache it until evicted.
+    telemetry_store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+        Store used by :meth:`get_telemetry` to keep downloaded telemetry on disk.
+    rate_limiter : Optional[:class:`pybattlerite.ratelimit.RateLimiter`]
+        Limiter pacing this client's API requests, pass one instance to several clients to share
+        a key's budget. By default each client gets its own limiter driven by the API's rate limit headers.
+    retry : Optional[:class:`pybattlerite.retry.RetryPolicy`]
+        How failed requests are retried, defaults to a :class:`pybattlerite.retry.RetryPolicy` with its
+        default settings. Pass `RetryPolicy(max_attempts=1)` to never retry.
+    pool_size : int, Default[100]
+        Connections kept open per host, should be at least the number of threads making requests.
+    timeout : tuple(float, float), Default[(5, 30)]
+        Connect and read timeouts in seconds, `None` to wait forever.
+    compress : bool, Default[True]
+        Ask for gzip or deflate compressed responses, `False` asks for uncompressed ones.
+    json_loads : Optional[str or callable]
+        JSON decoder for API responses and telemetry, `'orjson'`, `'ujson'`, `'json'` or a function.
+        Defaults to the fastest installed one, see :func:`pybattlerite.utils.get_json_loads`.
+
+    `pool_size` and `timeout` configure the session created when `session` is omitted.
     """
-    def __init__(self, key, session: requests.Session=None, lang: str='English'):
+    match_cls = Match
+
+    def __init__(self, key, session: requests.Session=None, lang: str='English', lazy: bool=False,
+                 coalesce: bool=False, cache=None, cache_ttls: dict=None,
+                 telemetry_store=None, rate_limiter=None, retry=None,
+                 pool_size: int=100, timeout: tuple=(5.0, 30.0), compress: bool=True, json_loads=None):
         if lang in self.avl_langs:
             self.lang = lang
         else:
             raise Exception('{0} is not an available language.\nAs of now only'
                             'these languages are available:{1}'.format(lang, ', '.join(self.avl_langs)))
-        self.session = session or requests.Session()
+        if lazy:
+            self.match_cls = LazyMatch
+        self.session = session or PooledSession(pool_size, timeout)
         self.base_url = "https://api.dc01.gamelockerapp.com/shards/global/"
         self.status_url = "https://api.dc01.gamelockerapp.com/status"
         self.headers = {
             'Authorization': 'Bearer {}'.format(key),
             'Accept': 'application/json'
         }
+        self.headers['Accept-Encoding'] = 'gzip, deflate' if compress else 'identity'
+        self.coalesce = coalesce
+        self.cache = cache
+        self.cache_ttls = dict(self.cache_ttls, **(cache_ttls or {}))
+        self.telemetry_store = telemetry_store
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.hooks = []
+        self.json_loads = get_json_loads(json_loads)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
 
     def gen_req(self, url, params=None, session=None):
-        sess = session or self.session
-        print(params)
-        with sess.get(url, headers=self.headers,
-                      params=params) as req:
+        key = self.request_key(url, params)
+        ttl = 0 if self.cache is None else self.cache_ttl(url)
+        if ttl != 0:
+            resp = self.cache.get(key)
+            if resp is not None:
+                return resp
+        if self.coalesce:
+            resp = self._coalesced(key, url, params, session)
+        else:
+            resp = self._request(url, params, session)
+        if ttl != 0:
+            self.cache.set(key, resp, ttl)
+        return resp
+
+    def _coalesced(self, key, url, params, session):
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Flight()
+        if leader:
             try:
-                resp = req.json()
-            except (requests.Timeout, requests.ConnectionError):
-                raise BRRequestException(req, {})
+                flight.result = self._request(url, params, session)
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+        return flight.result
 
-            if 300 > req.status_code >= 200:
-                return resp
+    def _request(self, url, params=None, session=None):
+        sess = session or self.session
+        event = RequestEvent(url, self.endpoint(url), params)
+        began = time.perf_counter()
+        started = time.monotonic()
+        attempt = throttled = 0
+        while True:
+            waited = time.perf_counter()
+            self.rate_limiter.acquire()
+            sent = time.perf_counter()
+            event.queue += sent - waited
+            event.attempts += 1
+            req = error = None
+            try:
+                req = sess.get(url, headers=self.headers, params=params, stream=True)
+                event.ttfb = time.perf_counter() - sent
+                body = req.content
+                event.download = time.perf_counter() - sent - event.ttfb
+            except (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                if req is not None:
+                    req.close()
+                error = e
+                delay = self.retry.retry_delay(attempt, started, error=e)
+                if delay is None:
+                    event.error = BRConnectionException(e)
+                    self._finish(event, began)
+                    raise event.error from e
+            else:
+                self.rate_limiter.update(req.headers)
+                if req.status_code == 429 and throttled < self.rate_limiter.max_throttled:
+                    throttled += 1
+                    self.rate_limiter.throttle(req.headers)
+                    req.close()
+                    continue
+                delay = self.retry.retry_delay(attempt, started, status=req.status_code)
+                if delay is None:
+                    break
+                req.close()
+            if self.hooks:
+                self.emit(RetryEvent(url, event.endpoint, attempt + 2, delay,
+                                     None if error else req.status_code, error))
+            attempt += 1
+            time.sleep(delay)
+
+        with req:
+            decoding = time.perf_counter()
+            try:
+                resp = self.json_loads(body)
+            except ValueError:
+                resp = None
+            event.decode = time.perf_counter() - decoding
+            event.status = req.status_code
+            event.bytes = len(body)
+
+            if resp is not None and 300 > req.status_code >= 200:
+                error = None
             elif req.status_code == 404:
-                raise NotFoundException(req, resp)
-            elif req.status_code > 500:
-                raise BRServerException(req, resp)
+                error = NotFoundException(req, resp or {})
+            elif req.status_code > 500 or resp is None:
+                error = BRServerException(req, resp or {})
             else:
-                raise BRRequestException(req, resp)
+                error = BRRequestException(req, resp)
+        event.error = error
+        self._finish(event, began)
+        if error is not None:
+            raise error
+        return resp
+
+    def fetch_matches(self, url, params=None, session=None):
+        """
+        Request a page of /matches and build its matches.
+
+        Returns
+        -------
+        tuple(dict, list(:class:`pybattlerite.models.Match`))
+            The page's `links` and its matches.
+        """
+        return self._page(self.gen_req(url, params, session))
 
     def get_status(self):
         """
@@ -83,7 +265,42 @@ class Client(ClientBase):
             A match object representing the requested match.
         """
         data = self.gen_req("{0}matches/{1}".format(self.base_url, match_id))
-        return Match(data, self.session)
+        started = time.perf_counter()
+        match = self.match_cls(data)
+        self._built('Match', started, 1)
+        return match
+
+    def get_telemetry(self, match):
+        """
+        Get telemetry data for a match with this client's session, through its telemetry store if it has one.
+
+        Parameters
+        ----------
+        match : :class:`pybattlerite.models.Match`
+
+        Returns
+        -------
+        `dict`
+            Match telemetry data
+        """
+        return match.get_telemetry(self.session, self.telemetry_store, self.json_loads)
+
+    def iter_telemetry(self, match, types: list=None):
+        """
+        Stream a match's telemetry events with this client's session, through its telemetry store if it has one.
+
+        Parameters
+        ----------
+        match : :class:`pybattlerite.models.Match`
+        types : Optional[list(str)]
+            Only yield events of these types, e.g. `'Structures.DeathEvent'`.
+
+        Returns
+        -------
+        iterator
+            Telemetry events, each a `dict`, in order.
+        """
+        return match.iter_telemetry(self.session, types, self.telemetry_store)
 
     def get_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
                     server_type: str=None, ranking_type: str=None, patch_version: list=None):
@@ -122,11 +339,134 @@ class Client(ClientBase):
         params = self.prepare_match_params(offset, limit, after, before, playerids, server_type, ranking_type,
                                            patch_version)
 
-        data = self.gen_req("{}matches".format(self.base_url), params=params)
-        matches = []
-        for match in data['data']:
-            matches.append(Match(match, self.session, data['included']))
-        return MatchPaginator(matches, data['links'], self)
+        links, matches = self.fetch_matches("{}matches".format(self.base_url), params=params)
+        return MatchPaginator(matches, links, self)
+
+    def prefetch_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
+                         server_type: list=None, ranking_type: list=None, patch_version: list=None,
+                         prefetch: int=4, concurrency: int=4):
+        """
+        Iterate over every match of a /matches query, fetching later pages ahead of the consumer.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+
+        Parameters
+        ----------
+        offset : Optional[int]
+            The nth number of match to start from.
+        limit : Optional[int]
+            Number of matches per page, 5 if omitted.
+        after : Optional[str or datetime.datetime_]
+            Filter to return matches after provided time period, if an str is provided it should follow the **iso8601** format.
+        before :  Optional[str or datetime.datetime_]
+            Filter to return matches before provided time period, if an str is provided it should follow the **iso8601** format.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+        prefetch : int, Default[4]
+            How many pages to keep requested ahead of the page being consumed.
+        concurrency : int, Default[4]
+            Maximum number of page requests in flight at once, the size of the thread pool.
+
+        Returns
+        -------
+        :class:`pybattlerite.models.MatchPrefetcher`
+            An iterator yielding :class:`pybattlerite.models.Match` objects in order.
+        """
+        params = self.prepare_match_params(offset, limit, after, before, playerids, server_type, ranking_type,
+                                           patch_version)
+        return MatchPrefetcher(self, params, prefetch, concurrency)
+
+    def iter_matches(self, offset: int=None, limit: int=None, after=None, before=None, playerids: list=None,
+                     server_type: list=None, ranking_type: list=None, patch_version: list=None, cursor: str=None):
+        """
+        Stream every match of a /matches query one at a time, following each page's next link.
+
+        Only one page is held in memory at a time, the returned stream's `offset` can be saved and
+        passed back as `offset` to resume later.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+
+        Parameters
+        ----------
+        offset : Optional[int]
+            The nth number of match to start from.
+        limit : Optional[int]
+            Number of matches per page, 5 if omitted.
+        after : Optional[str or datetime.datetime_]
+            Filter to return matches after provided time period, if an str is provided it should follow the **iso8601** format.
+        before :  Optional[str or datetime.datetime_]
+            Filter to return matches before provided time period, if an str is provided it should follow the **iso8601** format.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+        cursor : Optional[str]
+            A saved `next_url` of a previous stream to resume from, the filters are ignored when this is given.
+
+        Returns
+        -------
+        :class:`pybattlerite.models.MatchStream`
+            An iterator yielding :class:`pybattlerite.models.Match` objects.
+        """
+        params = {} if cursor else self.prepare_match_params(offset, limit, after, before, playerids, server_type,
+                                                             ranking_type, patch_version)
+        return MatchStream(self, params, cursor)
+
+    def backfill(self, after, before, windows: int=8, processes: int=None, split_after: int=500,
+                 min_window: datetime.timedelta=datetime.timedelta(minutes=5), limit: int=None,
+                 playerids: list=None, server_type: list=None, ranking_type: list=None, patch_version: list=None):
+        """
+        Crawl every match in `[after, before)` by splitting the range into windows crawled in parallel.
+
+        Dense windows are split further as they are found and matches are deduplicated by id,
+        see :class:`pybattlerite.backfill.BackfillBase`. Matches are not yielded in time order.
+
+        .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
+        .. _datetime.timedelta: https://docs.python.org/3.6/library/datetime.html#timedelta-objects
+
+        Parameters
+        ----------
+        after : str or datetime.datetime_
+            Start of the range, if an str is provided it should follow the **iso8601** format.
+        before : str or datetime.datetime_
+            End of the range, if an str is provided it should follow the **iso8601** format.
+        windows : int, Default[8]
+            Number of windows the range is split into up front.
+        processes : Optional[int]
+            Size of the process pool windows are crawled on, defaults to the number of CPUs.
+        split_after : int, Default[500]
+            Number of matches after which a window that still has more is split in two.
+        min_window : datetime.timedelta_, Default[5 minutes]
+            Windows are never split below this length.
+        limit : Optional[int]
+            Number of matches per page.
+        playerids : Optional[list]
+            Filter to only return matches with provided players in them by looking for their player IDs.
+        server_type : Optional[list(str)]
+            The match's server_type, can be either 'QUICK2V2', 'QUICK3V3' or 'PRIVATE'.
+        ranking_type : Optional[list(str)]
+            The match's rank type, either 'RANKED', 'UNRANKED' or 'NONE'.
+        patch_version : Optional[list(str)]
+            The Battlerite patch versions you want data for, this doesn't go through any tests so check your versions.
+
+        Returns
+        -------
+        :class:`pybattlerite.backfill.Backfill`
+            An iterator yielding :class:`pybattlerite.models.Match` objects, with throughput in its `stats`.
+        """
+        return Backfill(self, after, before, windows, processes, split_after, min_window, limit=limit,
+                        playerids=playerids, server_type=server_type, ranking_type=ranking_type,
+                        patch_version=patch_version)
 
     def player_by_id(self, player_id: int):
         """
@@ -142,17 +482,23 @@ class Client(ClientBase):
             A Player object representing the requested player.
         """
         data = self.gen_req("{0}players/{1}".format(self.base_url, player_id))
-        return Player(data['data'], self.lang)
+        started = time.perf_counter()
+        player = Player(data['data'], self.lang)
+        self._built('Player', started, 1)
+        return player
 
     def _players(self, playerids: list=None, steamids: list=None, usernames: list=None, single=False):
         params = self.prepare_players_params(playerids, steamids, usernames)
         data = self.gen_req("{0}players".format(self.base_url), params=params)
         if len(data['data']) == 0:
             raise EmptyResponseException("No Players with the specified criteria were found.")
+        started = time.perf_counter()
         if not single:
-            return [Player(player, self.lang) for player in data['data']]
+            players = [Player(player, self.lang) for player in data['data']]
         else:
-            return Player(data['data'][0], self.lang)
+            players = Player(data['data'][0], self.lang)
+        self._built('Player', started, 1 if single else len(players))
+        return players
 
     def get_players(self, playerids: list=None, steamids: list=None, usernames: list=None):
         """
@@ -180,6 +526,46 @@ class Client(ClientBase):
         """
         return self._players(playerids, steamids, usernames)
 
+    def get_players_bulk(self, playerids: list=None, steamids: list=None, usernames: list=None,
+                         concurrency: int=4):
+        """
+        Get any number of players' info, batching the lookup into requests of 6 ids each.
+
+        .. _here: https://developer.valvesoftware.com/wiki/SteamID
+
+        Parameters
+        ----------
+        playerids : Optional[list]
+            A list of playerids, either a `list` of strs or a `list` of ints.
+        steamids : Optional[list]
+            A list of steamids, a `list` of ints, this accepts only `SteamID64` specification, check here_ for more
+            details.
+            Players found by steamid can't be matched back to their ids, so a request of 6 that only finds
+            some of them is repeated one id at a time to tell which are missing.
+        usernames : Optional[list]
+            A list of usernames, a `list` of strings, case insensitive.
+        concurrency : int, Default[4]
+            Maximum number of requests in flight at once, the size of the thread pool.
+
+        Returns
+        -------
+        tuple(players: list, missing: list)
+            The :class:`pybattlerite.models.Player` objects that were found, in input order, and the ids or
+            names that weren't. No :class:`pybattlerite.errors.EmptyResponseException` is raised for misses.
+        """
+        chunks = self.prepare_bulk_players_params(playerids, steamids, usernames)
+
+        def fetch(params):
+            return self.gen_req("{0}players".format(self.base_url), params=params)['data']
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, [params for _, _, params in chunks]))
+            chunks, results = self.split_partial_steamids(chunks, results)
+            retries = [i for i, data in enumerate(results) if data is None]
+            for i, data in zip(retries, pool.map(fetch, [chunks[i][2] for i in retries])):
+                results[i] = data
+        return self.merge_bulk_players(chunks, results)
+
     def player_by_name(self, username):
         """
         Get a player's info by their ingame name.
@@ -215,5 +601,8 @@ class Client(ClientBase):
         """
         params = self.prepare_teams_params(playerids, season)
         data = self.gen_req("{0}teams".format(self.base_url), params=params)
-        return [Team(team) for team in data['data']]
+        started = time.perf_counter()
+        teams = [Team(team) for team in data['data']]
+        self._built('Team', started, len(teams))
+        return teams
 
@@ -1,6 +1,41 @@
 import datetime
+import threading
+import time
 
 from .errors import BRFilterException
+from .instrument import BuildEvent
+from .models import Player, _index_included
+from .utils import StackableFinder, as_utc, format_iso, get_localizer, parse_iso
+
+
+class Flight:
+    """
+    A request in flight that identical concurrent requests on a sync client wait on.
+    """
+    __slots__ = ['done', 'result', 'error']
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def parse_matches(match_cls, loads, body):
+    """
+    Decode a /matches response body and build its matches, this is what an async client's
+    executor runs.
+
+    Returns
+    -------
+    tuple(dict, list, float, float)
+        The response's links, the matches, and the seconds spent decoding and building.
+    """
+    started = time.perf_counter()
+    data = loads(body)
+    decoded = time.perf_counter()
+    included = _index_included(data['included'])
+    matches = [match_cls(match, included) for match in data['data']]
+    return data.get('links', {}), matches, decoded - started, time.perf_counter() - decoded
 
 
 class ClientBase:
@@ -9,6 +44,105 @@ class ClientBase:
                  'SChinese', 'Spanish', 'Turkish']
     server_types = ['QUICK2V2', 'QUICK3V3', 'PRIVATE']
     ranking_types = ['RANKED', 'UNRANKED', 'NONE']
+    # Seconds a response is cached for by endpoint, 0 is never and None is until evicted
+    cache_ttls = {
+        'matches/{id}': None,
+        'matches': 0,
+        'players/{id}': 300,
+        'players': 300,
+        'teams': 300,
+        'status': 0
+    }
+
+    @property
+    def stackables(self):
+        """
+        The process-wide :class:`pybattlerite.utils.StackableFinder` shared by every client and model.
+        """
+        return StackableFinder.shared()
+
+    @property
+    def localizer(self):
+        """
+        The shared :class:`pybattlerite.utils.Localizer` for this client's language.
+        """
+        return get_localizer(self.lang)
+
+    def endpoint(self, url):
+        """
+        The endpoint `url` requests, e.g. `'matches'`, `'matches/{id}'` or `'status'`, `None` for urls outside the API.
+        """
+        if url == self.status_url:
+            return 'status'
+        if not url.startswith(self.base_url):
+            return None
+        parts = url[len(self.base_url):].split('?')[0].strip('/').split('/')
+        return parts[0] + ('/{id}' if len(parts) > 1 else '')
+
+    def cache_ttl(self, url):
+        """
+        How long a response from `url` may be cached for, looked up by endpoint in :attr:`cache_ttls`.
+        """
+        return self.cache_ttls.get(self.endpoint(url), 0)
+
+    def add_hook(self, hook):
+        """
+        Report this client's activity to `hook`.
+
+        The hook is called as `hook(event)` with a :class:`pybattlerite.instrument.RequestEvent` for every
+        API request, a :class:`pybattlerite.instrument.RetryEvent` for every retry and a
+        :class:`pybattlerite.instrument.BuildEvent` whenever models are built from a response. Hooks are
+        called on the thread or event loop making the request and should return quickly,
+        :class:`pybattlerite.instrument.HistogramCollector` is a ready-made one.
+
+        Parameters
+        ----------
+        hook : callable
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Stop reporting to a hook added with :meth:`add_hook`.
+        """
+        self.hooks.remove(hook)
+
+    def emit(self, event):
+        """
+        Pass an event to every hook.
+        """
+        for hook in self.hooks:
+            hook(event)
+
+    def _finish(self, event, began):
+        event.total = time.perf_counter() - began
+        if self.hooks:
+            self.emit(event)
+
+    def _built(self, model, started, count):
+        if self.hooks:
+            self.emit(BuildEvent(model, count, time.perf_counter() - started))
+
+    @staticmethod
+    def request_key(url, params):
+        """
+        A hashable key identifying a GET request, params are normalized so their order doesn't matter.
+        """
+        return url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    def build_matches(self, data):
+        """
+        Build :attr:`match_cls` objects for every match in a /matches response, the response's
+        included resources are indexed once and shared by all of them.
+        """
+        started = time.perf_counter()
+        included = _index_included(data['included'])
+        matches = [self.match_cls(match, included) for match in data['data']]
+        self._built('Match', started, len(matches))
+        return matches
+
+    def _page(self, data):
+        return data['links'], self.build_matches(data)
 
     @staticmethod
     def _isocheck(time):
@@ -16,43 +150,37 @@ class ClientBase:
         Check if a time string is compatible with iso8601
         """
         try:
-            datetime.datetime.strptime(time, "%Y-%m-%dT%H:%M:%SZ")
+            parse_iso(time)
             return True
         except ValueError:
             return False
 
+    @staticmethod
+    def _isofilter(value, name):
+        """
+        Parse an 'after' or 'before' filter into an aware UTC datetime, each value is parsed only once.
+        """
+        if isinstance(value, datetime.datetime):
+            return as_utc(value)
+        try:
+            return parse_iso(value)
+        except (TypeError, ValueError):
+            raise BRFilterException("'{}', if instance of 'str', should follow the 'iso8601' format "
+                                    "'%Y-%m-%dT%H:%M:%SZ'".format(name)) from None
+
     def prepare_match_params(self, offset, limit, after, before, playerids, server_type, ranking_type, patch_version):
-        if after and before:
-            if isinstance(after, datetime.datetime) and isinstance(before, datetime.datetime):
-                if before <= after:
-                    raise BRFilterException("'after' must occur at a time before 'before'")
-                else:
-                    after = after.strftime("%Y-%m-%dT%H:%M:%SZ")
-                    before = before.strftime("%Y-%m-%dT%H:%M:%SZ")
-            elif isinstance(after, str) and isinstance(before, str):
-                if not all(map(self._isocheck, (after, before))):
-                    raise BRFilterException("'after' or 'before', if instances of 'str', should follow the "
-                                            "'iso8601' format '%Y-%m-%dT%H:%M:%SZ'")
-                t_after = datetime.datetime.strptime(after, "%Y-%m-%dT%H:%M:%SZ")
-                t_before = datetime.datetime.strptime(before, "%Y-%m-%dT%H:%M:%SZ")
-                if t_before <= t_after:
-                    raise BRFilterException("'after' must occur at a time before 'before'")
-            else:
-                raise BRFilterException("'after' and 'before' should both be instances "
-                                        "of either 'str' or 'datetime.datetime'")
-        else:
-            if after:
-                if isinstance(after, datetime.datetime):
-                    after = after.strftime("%Y-%m-%dT%H:%M:%SZ")
-                elif not self._isocheck(after):
-                    raise BRFilterException("'after', if instance of 'str', should follow the 'iso8601' format "
-                                            "'%Y-%m-%dT%H:%M:%SZ'")
-            elif before:
-                if isinstance(before, datetime.datetime):
-                    before = before.strftime("%Y-%m-%dT%H:%M:%SZ")
-                elif not self._isocheck(before):
-                    raise BRFilterException("'before', if instance of 'str', should follow the 'iso8601' format "
-                                            "'%Y-%m-%dT%H:%M:%SZ'")
+        if after and before and not (isinstance(after, str) and isinstance(before, str) or
+                                     isinstance(after, datetime.datetime) and isinstance(before, datetime.datetime)):
+            raise BRFilterException("'after' and 'before' should both be instances "
+                                    "of either 'str' or 'datetime.datetime'")
+        if after:
+            after = self._isofilter(after, 'after')
+        if before:
+            before = self._isofilter(before, 'before')
+        if after and before and before <= after:
+            raise BRFilterException("'after' must occur at a time before 'before'")
+        after = after and format_iso(after)
+        before = before and format_iso(before)
 
         if limit and limit not in range(1, 6):
             raise BRFilterException("'limit' can only range from 1-5")
@@ -115,6 +243,75 @@ class ClientBase:
 
         return params
 
+    @staticmethod
+    def prepare_bulk_players_params(playerids, steamids, usernames):
+        """
+        Split a bulk player lookup into /players requests of at most 6 ids each.
+
+        Returns a list of `(kind, chunk, params)` tuples, `kind` being 'playerids', 'steamids' or 'usernames'.
+        """
+        if not any((playerids, steamids, usernames)):
+            raise BRFilterException("One of the filters 'playerids', 'steamids' and 'usernames' is required.")
+        chunks = []
+        for kind, values in (('playerids', playerids), ('steamids', steamids), ('usernames', usernames)):
+            values = list(values or [])
+            for i in range(0, len(values), 6):
+                chunk = values[i:i + 6]
+                filters = {'playerids': None, 'steamids': None, 'usernames': None, kind: chunk}
+                chunks.append((kind, chunk, ClientBase.prepare_players_params(**filters)))
+        return chunks
+
+    @staticmethod
+    def split_partial_steamids(chunks, results):
+        """
+        Replace every steamid chunk that was only partly found with one request per id.
+
+        Player resources don't carry their steam id, so a partial answer can't be matched back
+        to the ids that were asked for. Returns `(chunks, results)`, with `None` in `results`
+        for the single id chunks that still have to be requested.
+        """
+        split_chunks = []
+        split_results = []
+        for (kind, chunk, params), data in zip(chunks, results):
+            if kind == 'steamids' and 0 < len(data) < len(chunk):
+                for value in chunk:
+                    split_chunks.append((kind, [value], ClientBase.prepare_players_params(None, [value], None)))
+                    split_results.append(None)
+            else:
+                split_chunks.append((kind, chunk, params))
+                split_results.append(data)
+        return split_chunks, split_results
+
+    def merge_bulk_players(self, chunks, results):
+        """
+        Merge the responses to :meth:`prepare_bulk_players_params` requests into
+        `(players, missing)`, both in input order.
+        """
+        started = time.perf_counter()
+        players = []
+        missing = []
+        for (kind, chunk, _), data in zip(chunks, results):
+            found = [Player(player, self.lang) for player in data]
+            if kind == 'steamids':
+                # Partly found chunks were split by split_partial_steamids, so these are all or nothing
+                players.extend(found)
+                if len(found) < len(chunk):
+                    missing.extend(chunk)
+                continue
+            if kind == 'playerids':
+                by_key = {str(player.id): player for player in found}
+                keys = [str(value) for value in chunk]
+            else:
+                by_key = {player.name.lower(): player for player in found}
+                keys = [str(value).lower() for value in chunk]
+            for value, key in zip(chunk, keys):
+                if key in by_key:
+                    players.append(by_key[key])
+                else:
+                    missing.append(value)
+        self._built('Player', started, len(players))
+        return players, missing
+
     @staticmethod
     def prepare_teams_params(playerids, season):
         if not all((playerids, season)):
@@ -36,6 +36,23 @@ class BRServerException(BRRequestException):
     pass
 
 
+class BRConnectionException(BRRequestException):
+    """
+    Raised when a request failed without a response, because of a connection error or timeout,
+    on every attempt allowed by the client's :class:`pybattlerite.retry.RetryPolicy`.
+
+    Parameters
+    ----------
+    error : Exception
+        The error of the last attempt.
+    """
+    def __init__(self, error):
+        self.reason = str(error) or type(error).__name__
+        self.status = None
+        self.error = None
+        Exception.__init__(self, "Connection failed - {}".format(self.reason))
+
+
 class BRFilterException(Exception):
     """
     Raised when an invalid filter value is supplied.
@@ -0,0 +1,168 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _factorize(column):
+    """
+    Internal function returning a column's sorted distinct values and each row's index into them.
+    Object columns are factorized with a dict, `numpy.unique` can't compare `None` to `str`.
+    """
+    if column.dtype != object:
+        keys, inverse = numpy.unique(column, return_inverse=True)
+        return keys, inverse.reshape(-1)
+    codes = {}
+    inverse = numpy.fromiter((codes.setdefault(value, len(codes)) for value in column), dtype=numpy.int64,
+                             count=len(column))
+    # None, e.g. the user_id of bots, sorts last
+    ordered = sorted(codes, key=lambda value: (value is None, value if value is not None else ''))
+    rank = numpy.empty(len(codes), dtype=numpy.int64)
+    rank[[codes[value] for value in ordered]] = numpy.arange(len(codes))
+    keys = numpy.empty(len(ordered), dtype=object)
+    keys[:] = ordered
+    return keys, rank[inverse]
+
+
+class MatchFrame:
+    """
+    Participant statistics of many matches in columnar NumPy arrays, one row per participant.
+
+    Key columns are `match_id`, `roster_id`, `participant_id`, `user_id`, `patch`, `type`,
+    `game_mode` and `map_id` (object arrays), `actor`, `side`, `rounds`, `rounds_won` and `won`.
+    Stat columns are the numeric :class:`pybattlerite.models.Participant` stats as `float64`
+    arrays with NaN where the API left a stat out. Requires NumPy.
+
+    There is no round key: the API only reports participant stats for a whole match, so rounds
+    are summed up per row by `rounds` and `rounds_won` instead of getting rows of their own.
+
+    Parameters
+    ----------
+    matches : iterable
+        :class:`pybattlerite.models.Match` or :class:`pybattlerite.models.AsyncMatch` objects.
+
+    Attributes
+    ----------
+    columns : dict
+        Column name to `numpy.ndarray`.
+    """
+    __slots__ = ['columns']
+
+    keys = ['match_id', 'roster_id', 'participant_id', 'user_id', 'patch', 'type', 'game_mode', 'map_id']
+    stats = ['ability_uses', 'damage_done', 'damage_received', 'deaths', 'disables_done', 'disables_received',
+             'energy_gained', 'energy_used', 'healing_done', 'healing_received', 'kills', 'score', 'time_alive']
+
+    def __init__(self, matches):
+        if numpy is None:
+            raise ImportError("MatchFrame requires NumPy, install it with 'pip install numpy'")
+        rows = {name: [] for name in self.keys + self.stats + ['actor', 'side', 'rounds', 'rounds_won', 'won']}
+        for match in matches:
+            winners = [_round.winning_team for _round in match.rounds]
+            for roster in match.rosters:
+                for participant in roster.participants:
+                    rows['match_id'].append(match.id)
+                    rows['roster_id'].append(roster.id)
+                    rows['participant_id'].append(participant.id)
+                    rows['user_id'].append(participant.user_id)
+                    rows['patch'].append(match.patch)
+                    rows['type'].append(match.type)
+                    rows['game_mode'].append(match.game_mode)
+                    rows['map_id'].append(match.map_id)
+                    rows['actor'].append(participant.actor)
+                    rows['side'].append(participant.side)
+                    rows['rounds'].append(len(winners))
+                    rows['rounds_won'].append(winners.count(participant.side))
+                    rows['won'].append(roster.won)
+                    for stat in self.stats:
+                        value = getattr(participant, stat)
+                        rows[stat].append(float('nan') if value is None else value)
+        self.columns = {}
+        for name in self.keys:
+            self.columns[name] = numpy.array(rows[name], dtype=object)
+        for name in ('actor', 'side', 'rounds', 'rounds_won'):
+            self.columns[name] = numpy.array(rows[name], dtype=numpy.int64)
+        self.columns['won'] = numpy.array(rows['won'], dtype=bool)
+        for name in self.stats:
+            self.columns[name] = numpy.array(rows[name], dtype=numpy.float64)
+
+    def __repr__(self):
+        return "<MatchFrame: rows={}>".format(len(self))
+
+    def __len__(self):
+        return len(self.columns['match_id'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def groupby(self, by, columns=None, how='mean'):
+        """
+        Aggregate stat columns per distinct value of a key column.
+
+        NaN values are skipped, so means and sums only cover participants that have the stat.
+
+        Parameters
+        ----------
+        by : str
+            The column to group by, e.g. `'actor'`, `'patch'` or `'type'`.
+        columns : Optional[list(str)]
+            Numeric columns to aggregate, every stat column if omitted.
+        how : str, Default['mean']
+            `'mean'` or `'sum'`.
+
+        Returns
+        -------
+        dict
+            `by` mapped to the sorted distinct keys, `None` last, `'count'` to the number of rows per
+            key and every aggregated column to its per-key result, all as `numpy.ndarray`.
+        """
+        if how not in ('mean', 'sum'):
+            raise ValueError("'how' can only be 'mean' or 'sum'")
+        keys, inverse = _factorize(self.columns[by])
+        result = {by: keys, 'count': numpy.bincount(inverse, minlength=len(keys))}
+        for name in columns or self.stats:
+            values = self.columns[name].astype(numpy.float64)
+            present = ~numpy.isnan(values)
+            total = numpy.bincount(inverse[present], weights=values[present], minlength=len(keys))
+            if how == 'sum':
+                result[name] = total
+            else:
+                counts = numpy.bincount(inverse[present], minlength=len(keys))
+                with numpy.errstate(invalid='ignore', divide='ignore'):
+                    result[name] = total / counts
+        return result
+
+    def by_actor(self, columns=None, how='mean'):
+        """
+        Shortcut for :meth:`groupby` on `'actor'`, the champion played.
+        """
+        return self.groupby('actor', columns, how)
+
+    def by_patch(self, columns=None, how='mean'):
+        """
+        Shortcut for :meth:`groupby` on `'patch'`.
+        """
+        return self.groupby('patch', columns, how)
+
+    def by_type(self, columns=None, how='mean'):
+        """
+        Shortcut for :meth:`groupby` on `'type'`, the match type.
+        """
+        return self.groupby('type', columns, how)
+
+    def win_rate(self, by='actor'):
+        """
+        Share of rows on a winning roster per distinct value of a key column.
+
+        Parameters
+        ----------
+        by : str, Default['actor']
+
+        Returns
+        -------
+        dict
+            `by` mapped to the sorted distinct keys, `'count'` to the number of rows per key and
+            `'win_rate'` to the share of those rows that won, all as `numpy.ndarray`.
+        """
+        result = self.groupby(by, ['won'], 'sum')
+        result['win_rate'] = result.pop('won') / result['count']
+        return result
@@ -0,0 +1,327 @@
+import bisect
+import threading
+import time
+
+# Upper bounds in seconds of the histogram buckets, roughly the Prometheus client's defaults
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestEvent:
+    """
+    Timings of one API request, passed to the hooks added with :meth:`pybattlerite.clientbase.ClientBase.add_hook`
+    once the response is decoded or the request failed.
+
+    Every phase is in seconds, phases that didn't happen or can't be measured are `None`.
+
+    Attributes
+    ----------
+    kind : str
+        Always `'request'`.
+    url : str
+    endpoint : Optional[str]
+        The endpoint requested, e.g. `'matches'`, `'players/{id}'` or `'status'`, `None` for urls
+        outside the API.
+    params : Optional[dict]
+    status : Optional[int]
+        Status of the final response, `None` if no response was received.
+    bytes : int
+        Size of the final response body, after decompression.
+    attempts : int
+        Requests sent, including retries and requests queued again after a 429.
+    queue : float
+        Time spent waiting on the client's rate limiter, over all attempts.
+    connect : Optional[float]
+        Time spent resolving the host and opening a connection, only measured by the async client
+        on a session it created itself.
+    ttfb : Optional[float]
+        Time from sending the final request to receiving its response headers.
+    download : Optional[float]
+        Time spent reading the final response body.
+    decode : Optional[float]
+        Time spent decoding the JSON body.
+    total : float
+        Time from the first attempt until the response was decoded or the request failed.
+    error : Optional[Exception]
+        The error the request failed with, if it did.
+    """
+    __slots__ = ['url', 'endpoint', 'params', 'status', 'bytes', 'attempts', 'queue', 'connect', 'ttfb',
+                 'download', 'decode', 'total', 'error']
+    kind = 'request'
+
+    def __init__(self, url, endpoint, params=None):
+        self.url = url
+        self.endpoint = endpoint
+        self.params = params
+        self.status = None
+        self.bytes = 0
+        self.attempts = 0
+        self.queue = 0.0
+        self.connect = None
+        self.ttfb = None
+        self.download = None
+        self.decode = None
+        self.total = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return "<RequestEvent: endpoint={0.endpoint} status={0.status} total={0.total:.4f}>".format(self)
+
+    def phases(self):
+        """
+        Returns
+        -------
+        dict
+            The measured phases by name, phases that weren't measured are left out.
+        """
+        return {name: getattr(self, name) for name in ('queue', 'connect', 'ttfb', 'download', 'decode', 'total')
+                if getattr(self, name) is not None}
+
+
+class RetryEvent:
+    """
+    A failed attempt that is about to be retried.
+
+    Attributes
+    ----------
+    kind : str
+        Always `'retry'`.
+    url : str
+    endpoint : Optional[str]
+    attempt : int
+        Number of the upcoming attempt, starting at 2.
+    delay : float
+        Seconds waited before the retry.
+    status : Optional[int]
+        Status of the failed response, if one was received.
+    error : Optional[Exception]
+        The connection error or timeout, if no response was received.
+    """
+    __slots__ = ['url', 'endpoint', 'attempt', 'delay', 'status', 'error']
+    kind = 'retry'
+
+    def __init__(self, url, endpoint, attempt, delay, status=None, error=None):
+        self.url = url
+        self.endpoint = endpoint
+        self.attempt = attempt
+        self.delay = delay
+        self.status = status
+        self.error = error
+
+    def __repr__(self):
+        return "<RetryEvent: endpoint={0.endpoint} attempt={0.attempt} delay={0.delay:.3f}>".format(self)
+
+
+class BuildEvent:
+    """
+    Time spent building model objects from a decoded response.
+
+    Attributes
+    ----------
+    kind : str
+        Always `'build'`.
+    model : str
+        `'Match'`, `'Player'` or `'Team'`.
+    count : int
+        Objects built.
+    elapsed : float
+        Seconds spent building them.
+    """
+    __slots__ = ['model', 'count', 'elapsed']
+    kind = 'build'
+
+    def __init__(self, model, count, elapsed):
+        self.model = model
+        self.count = count
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "<BuildEvent: model={0.model} count={0.count} elapsed={0.elapsed:.4f}>".format(self)
+
+
+class Histogram:
+    """
+    A cumulative histogram of observed values, in the shape of a Prometheus histogram.
+
+    Parameters
+    ----------
+    buckets : tuple(float)
+        Sorted upper bounds of the buckets, an implicit `+Inf` bucket is added.
+    """
+    __slots__ = ['buckets', 'counts', 'count', 'sum']
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by interpolating inside its bucket, like Prometheus' `histogram_quantile`.
+
+        Parameters
+        ----------
+        q : float
+            Between 0 and 1.
+
+        Returns
+        -------
+        Optional[float]
+            `None` if nothing was observed, values in the `+Inf` bucket are reported as the largest bound.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class HistogramCollector:
+    """
+    A hook that aggregates client events into histograms and counters.
+
+    Add it to one or more clients with :meth:`pybattlerite.clientbase.ClientBase.add_hook` and
+    export it with :meth:`render` in the Prometheus text format, or read :meth:`summary`.
+    Requests to urls outside the API are labelled with the endpoint `'other'`.
+
+    .. code-block:: python
+
+        collector = HistogramCollector()
+        client = Client(key)
+        client.add_hook(collector)
+        ...
+        print(collector.render())
+
+    Parameters
+    ----------
+    buckets : tuple(float), Default[:data:`DEFAULT_BUCKETS`]
+    prefix : str, Default['pybattlerite']
+        Prefix of the exported metric names.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='pybattlerite'):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        # (metric, labels) -> Histogram, labels is a sorted tuple of (name, value)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, metric, labels, value):
+        key = metric, labels
+        try:
+            histogram = self.histograms[key]
+        except KeyError:
+            histogram = self.histograms.setdefault(key, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def _count(self, metric, labels, value=1):
+        key = metric, labels
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def __call__(self, event):
+        with self._lock:
+            if event.kind == 'request':
+                labels = (('endpoint', event.endpoint or 'other'),)
+                for phase, value in event.phases().items():
+                    self._observe('request_{}_seconds'.format(phase), labels, value)
+                self._count('requests_total', labels + (('status', str(event.status)),))
+                self._count('response_bytes_total', labels, event.bytes)
+            elif event.kind == 'retry':
+                self._count('retries_total', (('endpoint', event.endpoint or 'other'),))
+            elif event.kind == 'build':
+                labels = (('model', event.model),)
+                self._observe('build_seconds', labels, event.elapsed)
+                self._count('built_total', labels, event.count)
+
+    def reset(self):
+        """
+        Forget everything collected so far.
+        """
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Returns
+        -------
+        dict
+            Every histogram by `'metric{labels}'` with its `count`, `sum`, `mean` and estimated
+            quantiles, and every counter by the same kind of name.
+        """
+        out = {}
+        with self._lock:
+            for (metric, labels), histogram in sorted(self.histograms.items()):
+                stats = {'count': histogram.count, 'sum': histogram.sum,
+                         'mean': histogram.sum / histogram.count if histogram.count else None}
+                for q in quantiles:
+                    stats['p{:g}'.format(q * 100)] = histogram.quantile(q)
+                out[self._name(metric, labels)] = stats
+            for (metric, labels), value in sorted(self.counters.items()):
+                out[self._name(metric, labels)] = value
+        return out
+
+    def _name(self, metric, labels, extra=()):
+        labels = ','.join('{}="{}"'.format(k, v) for k, v in labels + extra)
+        return '{}_{}{}'.format(self.prefix, metric, '{' + labels + '}' if labels else '')
+
+    def render(self):
+        """
+        Returns
+        -------
+        str
+            Every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            declared = set()
+            for (metric, labels), histogram in sorted(self.histograms.items()):
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append('# TYPE {}_{} histogram'.format(self.prefix, metric))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append('{} {}'.format(self._name(metric + '_bucket', labels, (('le', le),)), cumulative))
+                lines.append('{} {!r}'.format(self._name(metric + '_sum', labels), histogram.sum))
+                lines.append('{} {}'.format(self._name(metric + '_count', labels), histogram.count))
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append('# TYPE {}_{} counter'.format(self.prefix, metric))
+                lines.append('{} {}'.format(self._name(metric, labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+def trace_config():
+    """
+    An :class:`aiohttp.TraceConfig` that records DNS and connection setup time into the
+    :class:`RequestEvent` passed as a request's `trace_request_ctx`.
+    """
+    import aiohttp
+
+    async def start(session, ctx, params):
+        ctx.connect_started = time.perf_counter()
+
+    async def end(session, ctx, params):
+        event = ctx.trace_request_ctx
+        if isinstance(event, RequestEvent):
+            event.connect = (event.connect or 0.0) + time.perf_counter() - ctx.connect_started
+
+    config = aiohttp.TraceConfig()
+    config.on_connection_create_start.append(start)
+    config.on_connection_create_end.append(end)
+    return config
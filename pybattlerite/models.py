@@ -1,23 +1,63 @@
-import datetime
+import aiohttp
+import asyncio
+import collections
+import requests
+import sys
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from urllib.parse import parse_qs
 
 from .errors import BRPaginationError
-from .utils import StackableFinder, Localizer
+from .errors import NotFoundException
+from .telemetry import AsyncTelemetryStream, TelemetryParser, _offload, raise_for_status
+from .utils import StackableFinder, get_localizer, json_loads, parse_iso
+
+
+def _index_included(included):
+    """
+    Internal function to index response['included'] by id, build this once per response and pass it
+    to every model made from that response.
+    """
+    if isinstance(included, dict):
+        return included
+    index = {}
+    for item in included:
+        index.setdefault(item['id'], item)
+    return index
 
 
 def _get_object(lst, _id):
     """
-    Internal function to grab data referenced inside response['included']
+    Internal function to grab data referenced inside response['included'], kept for compatibility,
+    models look ids up in the index made by :func:`_index_included` directly.
     """
+    if isinstance(lst, dict):
+        return lst.get(_id)
     for item in lst:
         if item['id'] == _id:
             return item
 
 
+def _intern(value):
+    """
+    Internal function to share strings that repeat across most matches, like shard ids and
+    match types, instead of keeping a copy per object.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Unset:
+    # Pickled in place of slots that were never set
+    pass
+
+
 class BaseBRObject:
     """
     A base object for most data classes
+
+    Models are plain values with every attribute in `__slots__`, they hold no session and pickle
+    as a flat tuple of their slot values.
     
     Attributes
     ----------
@@ -29,6 +69,33 @@ class BaseBRObject:
     def __init__(self, data):
         self.id = data['id']
 
+    @classmethod
+    def _state_slots(cls):
+        names = cls.__dict__.get('_slot_names')
+        if names is None:
+            names = []
+            for klass in reversed(cls.__mro__):
+                for name in klass.__dict__.get('__slots__', ()):
+                    if name not in names and name not in ('__dict__', '__weakref__'):
+                        names.append(name)
+            names = cls._slot_names = tuple(names)
+        return names
+
+    def __getstate__(self):
+        state = []
+        for name in self._state_slots():
+            try:
+                # Not getattr, lazy matches would decode everything they haven't decoded yet
+                state.append(object.__getattribute__(self, name))
+            except AttributeError:
+                state.append(_Unset)
+        return tuple(state)
+
+    def __setstate__(self, state):
+        for name, value in zip(self._state_slots(), state):
+            if value is not _Unset:
+                object.__setattr__(self, name, value)
+
 
 class Player(BaseBRObject):
     """
@@ -46,18 +113,21 @@ class Player(BaseBRObject):
     title : int
         This player's ingame title
     """
-    __slots__ = ['id', 'name', 'picture', 'title', 'stats']
+    __slots__ = ['name', 'picture', 'title', 'stats']
 
     def __init__(self, data, lang: str='English'):
         super().__init__(data)
         if data.get('attributes'):
             self.name = data['attributes']['name']
-            self.picture = data['attributes']['stats'].pop('picture')
-            self.title = data['attributes']['stats'].pop('title')
-            stackables = StackableFinder()
-            localizer = Localizer(lang)
+            self.picture = data['attributes']['stats']['picture']
+            self.title = data['attributes']['stats']['title']
+            stackables = StackableFinder.shared()
+            localizer = get_localizer(lang)
             self.stats = {}
+            # The response is left untouched, it may be shared with other callers
             for key, value in data['attributes']['stats'].items():
+                if key in ('picture', 'title'):
+                    continue
                 _item = stackables.find(key)
                 if _item is not None:
                     name = localizer.localize(_item['LocalizedName']) if _item['LocalizedName'] else _item['DevName']
@@ -78,7 +148,7 @@ class Team(BaseBRObject):
         super().__init__(data)
         data = data['attributes']
         self.name = data['name']
-        self.shard_id = data['shardId']
+        self.shard_id = _intern(data['shardId'])
         stats = data['stats']
         self.avatar = stats['avatar']
         self.division = stats['division']
@@ -137,9 +207,9 @@ class Participant(BaseBRObject):
 
     def __init__(self, participant, included):
         super().__init__(participant)
-        data = _get_object(included, participant['id'])
+        data = _index_included(included)[participant['id']]
         self.actor = data['attributes']['actor']
-        self.shard_id = data['attributes']['shardId']
+        self.shard_id = _intern(data['attributes']['shardId'])
         stats = data['attributes']['stats']
         self.attachment = stats['attachment']
         self.emote = stats['emote']
@@ -188,11 +258,11 @@ class Round(BaseBRObject):
     winning_team : int
         Signifies which of the teams/rosters won the round.
     """
-    __slots__ = ['duration', 'ordinal', 'winning_team', 'participants']
+    __slots__ = ['duration', 'ordinal', 'winning_team']
 
     def __init__(self, _round, included):
         super().__init__(_round)
-        data = _get_object(included, _round['id'])
+        data = _index_included(included)[_round['id']]
         self.duration = data['attributes']['duration']
         self.ordinal = data['attributes']['ordinal']
         self.winning_team = data['attributes']['stats']['winningTeam']
@@ -218,12 +288,13 @@ class Roster(BaseBRObject):
     participants : list
        A list of :class:`Participant` representing players that are part of the roster.
     """
-    __slots__ = ['shard_id', 'score', 'won', 'participants', 'team']
+    __slots__ = ['shard_id', 'score', 'won', 'participants']
 
     def __init__(self, roster, included):
         super().__init__(roster)
-        data = _get_object(included, roster['id'])
-        self.shard_id = data['attributes']['shardId']
+        included = _index_included(included)
+        data = included[roster['id']]
+        self.shard_id = _intern(data['attributes']['shardId'])
         self.score = data['attributes']['stats']['score']
         self.won = True if data['attributes']['won'] == 'true' else False
 
@@ -239,15 +310,17 @@ class MatchBase(BaseBRObject):
     """
     A class that holds data for a match.
 
+    Matches don't hold a session. The session they used to take as their second argument is
+    still accepted, ignored with a :class:`DeprecationWarning`.
+
     .. _datetime.datetime: https://docs.python.org/3.6/library/datetime.html#datetime-objects
-    .. _aiohttp.ClientSession: https://aiohttp.readthedocs.io/en/stable/client_reference.html#client-session
 
     Attributes
     ----------
     id : int
         A general unique ID for each type of data.
     created_at : datetime.datetime_
-        Time when the match was created.
+        Time when the match was created, timezone-aware in UTC.
     duration : int
         The match's duration in seconds.
     game_mode : str
@@ -268,48 +341,115 @@ class MatchBase(BaseBRObject):
         A list of :class:`Participant` objects representing spectators, this seems unimplemented in the game as of now.
     telemetry_url : str
         URL for the telemetry file for this match
-    session : Optional[aiohttp.ClientSession_]
-        Optional session to use to request match data.
     """
     __slots__ = ['created_at', 'duration', 'game_mode', 'patch', 'shard_id', 'map_id', 'type', 'telemetry_url',
-                 'rosters', 'rounds', 'spectators', 'session']
-
-    def __init__(self, data, session, included=None):
-        included = included or data['included']
-        data = data if included else data['data']
+                 'rosters', 'rounds', 'spectators']
+
+    def __init__(self, data, included=None, *removed):
+        if removed or included is not None and not isinstance(included, (list, dict)):
+            # Called the old way, as Match(data, session) or Match(data, session, included)
+            warnings.warn("Matches no longer take a session, pass one to get_telemetry instead",
+                          DeprecationWarning, stacklevel=2)
+            included = removed[0] if removed else None
+        if included is None:
+            included = data['included']
+            data = data['data']
+        included = _index_included(included)
         super().__init__(data)
-        self.created_at = datetime.datetime.strptime(data['attributes']['createdAt'], "%Y-%m-%dT%H:%M:%SZ")
         self.duration = data['attributes']['duration']
-        self.game_mode = data['attributes']['gameMode']
-        self.patch = data['attributes']['patchVersion']
-        self.shard_id = data['attributes']['shardId']
-        self.map_id = data['attributes']['stats']['mapID']
-        self.type = data['attributes']['stats']['type']
-        self.rosters = []
-        for roster in data['relationships']['rosters']['data']:
-            self.rosters.append(Roster(roster, included))
-        self.rounds = []
-        for _round in data['relationships']['rounds']['data']:
-            self.rounds.append(Round(_round, included))
-        self.spectators = []
-        for participant in data['relationships']['spectators']['data']:
-            self.spectators.append(Participant(participant, included))
-        self.telemetry_url = _get_object(included,
-                                         data['relationships']['assets']['data'][0]['id'])['attributes']['URL']
-        self.session = session
+        self.game_mode = _intern(data['attributes']['gameMode'])
+        self.patch = _intern(data['attributes']['patchVersion'])
+        self.shard_id = _intern(data['attributes']['shardId'])
+        self.map_id = _intern(data['attributes']['stats']['mapID'])
+        self.type = _intern(data['attributes']['stats']['type'])
+        self.telemetry_url = included[data['relationships']['assets']['data'][0]['id']]['attributes']['URL']
+        self._decode(data, included)
+
+    def _decode(self, data, included):
+        for name, decode in _match_decoders.items():
+            setattr(self, name, decode(data, included))
+
+
+# The expensive parts of a match, decoded eagerly by MatchBase and on first access by LazyMatchBase
+_match_decoders = {
+    'created_at': lambda data, included: parse_iso(data['attributes']['createdAt']),
+    'rosters': lambda data, included: [Roster(roster, included)
+                                       for roster in data['relationships']['rosters']['data']],
+    'rounds': lambda data, included: [Round(_round, included)
+                                      for _round in data['relationships']['rounds']['data']],
+    'spectators': lambda data, included: [Participant(participant, included)
+                                          for participant in data['relationships']['spectators']['data']]
+}
+
+
+def _referenced(data, included):
+    """
+    Internal function to narrow a page's included index to the resources one match's decoders read.
+    """
+    relationships = data['relationships']
+    ids = [ref['id'] for name in ('rosters', 'rounds', 'spectators') for ref in relationships[name]['data']]
+    for ref in relationships['rosters']['data']:
+        roster = included.get(ref['id'])
+        if roster is not None:
+            ids.extend(participant['id'] for participant in roster['relationships']['participants']['data'])
+    return {_id: included[_id] for _id in ids if _id in included}
+
+
+def _is_set(obj, name):
+    # Like hasattr, but without falling back to __getattr__
+    try:
+        object.__getattribute__(obj, name)
+        return True
+    except AttributeError:
+        return False
+
+
+class LazyMatchBase(MatchBase):
+    """
+    A :class:`MatchBase` that keeps the raw match data and only decodes `created_at`, `rosters`,
+    `rounds` and `spectators` the first time each of them is accessed.
+
+    Every other attribute is set up front, so filtering matches on `type`, `patch` or
+    `telemetry_url` never pays for building rosters and participants. A pickled lazy match only
+    carries the included resources it references, not those of the whole page it came from.
+    """
+    __slots__ = ['_data', '_included']
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        included = object.__getattribute__(self, '_included')
+        if included is None:
+            return state
+        state = list(state)
+        state[self._state_slots().index('_included')] = _referenced(self._data, included)
+        return tuple(state)
+
+    def _decode(self, data, included):
+        self._data = data
+        self._included = included
+
+    def __getattr__(self, name):
+        decode = _match_decoders.get(name)
+        if decode is None or self._data is None:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        value = decode(self._data, self._included)
+        setattr(self, name, value)
+        if all(_is_set(self, attr) for attr in _match_decoders):
+            # Everything is decoded, the raw data is no longer needed
+            self._data = self._included = None
+        return value
 
 
 class AsyncMatch(MatchBase):
     """
     Extends :class:`MatchBase` to add async :meth:`get_telemetry`.
     """
-    def __init__(self, data, session, included=None):
-        super().__init__(data, session, included)
+    __slots__ = ()
 
     def __repr__(self):
         return "<AsyncMatch: id={0.id} shard_id={0.shard_id}>".format(self)
 
-    async def get_telemetry(self, session=None):
+    async def get_telemetry(self, session=None, store=None, loads=None):
         """
         Get telemetry data for a match.
 
@@ -318,33 +458,79 @@ class AsyncMatch(MatchBase):
         Parameters
         ----------
         session : Optional[aiohttp.ClientSession_]
-            Optional session to use to request telemetry data.
+            Session to download with, a temporary one is opened when omitted.
+        store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+            Read the telemetry from this store if it has it, and save it there once downloaded.
+        loads : Optional[callable]
+            JSON decoder to use, defaults to :data:`pybattlerite.utils.json_loads`.
 
         Returns
         -------
         `dict`
             Match telemetry data
+
+        Raises
+        ------
+        BRRequestException
+            The telemetry couldn't be downloaded, :class:`pybattlerite.errors.NotFoundException` if it doesn't exist.
         """
-        sess = session or self.session
-        async with sess.get(self.telemetry_url, headers={'Accept': 'application/json'}) as resp:
-            data = await resp.json()
+        # The store's file and gzip I/O runs off the event loop
+        raw = await _offload(store.get, self.telemetry_url) if store is not None else None
+        if raw is None:
+            # Matches don't hold a session, a one-off session is opened when none is given
+            sess = session or aiohttp.ClientSession()
+            try:
+                async with sess.get(self.telemetry_url, headers={'Accept': 'application/json'}) as resp:
+                    raise_for_status(resp)
+                    raw = await resp.read()
+            finally:
+                if session is None:
+                    await sess.close()
+            data = (loads or json_loads)(raw)
+            # Only telemetry that decoded is stored, never an error page
+            if store is not None:
+                await _offload(store.put, self.telemetry_url, raw)
+        else:
+            data = (loads or json_loads)(raw)
 
-        # After understanding the telemetry structure, to provide it as usable data is going to be a tough ordeal,
-        # but one that can be looked into later
+        # See pybattlerite.telemetry.parse_event and TelemetryColumns for typed and columnar forms of this data
         return data
 
+    def iter_telemetry(self, session=None, types=None, store=None, chunk_size=65536):
+        """
+        Stream a match's telemetry events one at a time as the document downloads.
+
+        .. _aiohttp.ClientSession: https://aiohttp.readthedocs.io/en/stable/client_reference.html#client-session
+
+        Parameters
+        ----------
+        session : Optional[aiohttp.ClientSession_]
+            Session to download with, a temporary one is opened when omitted.
+        types : Optional[list(str)]
+            Only yield events of these types, e.g. `'Structures.DeathEvent'`.
+        store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+            Read the telemetry from this store if it has it, and save it there once fully downloaded.
+        chunk_size : int, Default[65536]
+            Bytes read from the response at a time.
+
+        Returns
+        -------
+        :class:`pybattlerite.telemetry.AsyncTelemetryStream`
+            An async iterator of telemetry events, each a `dict`.
+        """
+        return AsyncTelemetryStream(self.telemetry_url, session, types, store, chunk_size)
+
 
 class Match(MatchBase):
     """
     Extends :class:`MatchBase` to add :meth:`get_telemetry`
     """
-    def __init__(self, data, session, included=None):
-        super().__init__(data, session, included)
+    __slots__ = ()
 
     def __repr__(self):
         return "<Match: id={0.id} shard_id={0.shard_id}>".format(self)
 
-    def get_telemetry(self, session=None):
+    def get_telemetry(self, session=None, store=None, loads=None):
         """
         Get telemetry data for a match.
 
@@ -353,21 +539,92 @@ class Match(MatchBase):
         Parameters
         ----------
         session : Optional[requests.Session_]
-            Optional session to use to request telemetry data.
+            Session to download with, a temporary one is opened when omitted.
+        store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+            Read the telemetry from this store if it has it, and save it there once downloaded.
+        loads : Optional[callable]
+            JSON decoder to use, defaults to :data:`pybattlerite.utils.json_loads`.
 
         Returns
         -------
         `dict`
             Match telemetry data
+
+        Raises
+        ------
+        BRRequestException
+            The telemetry couldn't be downloaded, :class:`pybattlerite.errors.NotFoundException` if it doesn't exist.
         """
-        sess = session or self.session
-        with sess.get(self.telemetry_url, headers={'Accept': 'application/json'}) as resp:
-            data = resp.json()
+        raw = store.get(self.telemetry_url) if store is not None else None
+        if raw is None:
+            # Matches don't hold a session, a one-off session is opened when none is given
+            sess = session or requests.Session()
+            try:
+                with sess.get(self.telemetry_url, headers={'Accept': 'application/json'}) as resp:
+                    raise_for_status(resp)
+                    raw = resp.content
+            finally:
+                if session is None:
+                    sess.close()
+            data = (loads or json_loads)(raw)
+            # Only telemetry that decoded is stored, never an error page
+            if store is not None:
+                store.put(self.telemetry_url, raw)
+        else:
+            data = (loads or json_loads)(raw)
 
-        # After understanding the telemetry structure, to provide it as usable data is going to be a tough ordeal,
-        # but one that can be looked into later
+        # See pybattlerite.telemetry.parse_event and TelemetryColumns for typed and columnar forms of this data
         return data
 
+    def iter_telemetry(self, session=None, types=None, store=None, chunk_size=65536):
+        """
+        Stream a match's telemetry events one at a time as the document downloads, memory use stays
+        flat however long the match was.
+
+        .. _requests.Session: http://docs.python-requests.org/en/master/api/#request-sessions
+
+        Parameters
+        ----------
+        session : Optional[requests.Session_]
+            Session to download with, a temporary one is opened when omitted.
+        types : Optional[list(str)]
+            Only yield events of these types, e.g. `'Structures.DeathEvent'`.
+        store : Optional[:class:`pybattlerite.telemetry.TelemetryStore`]
+            Read the telemetry from this store if it has it, and save it there once fully downloaded.
+        chunk_size : int, Default[65536]
+            Bytes read from the response at a time.
+
+        Yields
+        ------
+        `dict`
+            Telemetry events, in order.
+        """
+        parser = TelemetryParser(types)
+        source = store.open(self.telemetry_url) if store is not None else None
+        if source is not None:
+            with source:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    yield from parser.feed(chunk)
+            parser.close()
+            return
+        sess = session or requests.Session()
+        writer = None
+        try:
+            with sess.get(self.telemetry_url, headers={'Accept': 'application/json'}, stream=True) as resp:
+                raise_for_status(resp)
+                if store is not None:
+                    writer = store.writer(self.telemetry_url)
+                for chunk in resp.iter_content(chunk_size):
+                    if writer is not None:
+                        writer.write(chunk)
+                    yield from parser.feed(chunk)
+            parser.close()
+        finally:
+            if writer is not None:
+                writer.close(error=parser.state != TelemetryParser.END)
+            if session is None:
+                sess.close()
+
 
 class Paginator:
     """
@@ -405,12 +662,8 @@ class AsyncMatchPaginator(Paginator):
                                                                          bool(self.prev_url))
 
     async def _matchmaker(self, url, sess=None):
-        data = await self.client.gen_req("{}matches".format(url), session=sess)
-        matches = []
-        for match in data['data']:
-            matches.append(AsyncMatch(match, self.client.session, data['included']))
-        print(matches)
-        self.__init__(matches, data['links'], self.client)
+        links, matches = await self.client.fetch_matches("{}matches".format(url), session=sess)
+        self.__init__(matches, links, self.client)
         return matches
 
     async def next(self, session=None):
@@ -500,12 +753,8 @@ class MatchPaginator(Paginator):
                                                                     bool(self.prev_url))
 
     def _matchmaker(self, url, sess=None):
-        data = self.client.gen_req("{}matches".format(url), session=sess)
-        matches = []
-        for match in data['data']:
-            matches.append(Match(match, self.client.session, data['included']))
-        print(matches)
-        self.__init__(matches, data['links'], self.client)
+        links, matches = self.client.fetch_matches("{}matches".format(url), session=sess)
+        self.__init__(matches, links, self.client)
         return matches
 
     def next(self, session=None):
@@ -581,3 +830,261 @@ class MatchPaginator(Paginator):
             return matches
         else:
             raise BRPaginationError("This is the first page")
+
+
+class LazyAsyncMatch(LazyMatchBase, AsyncMatch):
+    """
+    An :class:`AsyncMatch` that decodes lazily, see :class:`LazyMatchBase`.
+    """
+    __slots__ = ()
+    def __repr__(self):
+        return "<LazyAsyncMatch: id={0.id} shard_id={0.shard_id}>".format(self)
+
+
+class LazyMatch(LazyMatchBase, Match):
+    """
+    A :class:`Match` that decodes lazily, see :class:`LazyMatchBase`.
+    """
+    __slots__ = ()
+    def __repr__(self):
+        return "<LazyMatch: id={0.id} shard_id={0.shard_id}>".format(self)
+
+
+class PrefetcherBase:
+    """
+    Shared state for :class:`AsyncMatchPrefetcher` and :class:`MatchPrefetcher`.
+
+    Pages are requested by walking `page[offset]` forward from the first requested offset, so
+    they can be issued before the previous page has arrived. Iteration stops at the first page
+    that comes back short, empty or 404.
+    """
+    __slots__ = ['client', 'params', 'url', 'limit', 'prefetch', 'concurrency', 'matches', 'pending', 'next_offset',
+                 'done']
+
+    def __init__(self, client, params, prefetch, concurrency):
+        if prefetch < 1 or concurrency < 1:
+            raise ValueError("'prefetch' and 'concurrency' must be at least 1")
+        self.client = client
+        self.params = params
+        self.url = "{}matches".format(client.base_url)
+        self.limit = params.get('page[limit]') or 5
+        self.next_offset = params.get('page[offset]') or 0
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.matches = collections.deque()
+        self.pending = collections.deque()
+        self.done = False
+
+    def _next_params(self):
+        params = dict(self.params)
+        params['page[offset]'] = self.next_offset
+        params['page[limit]'] = self.limit
+        self.next_offset += self.limit
+        return params
+
+    def _page_done(self, matches):
+        self.matches.extend(matches)
+        if len(matches) < self.limit:
+            self.done = True
+
+
+class AsyncMatchPrefetcher(PrefetcherBase):
+    """
+    Async iterator over every match of a *get_matches* query, in order, with up to `prefetch`
+    later pages already requested while the current one is consumed.
+
+    Returned by :meth:`pybattlerite.AsyncClient.prefetch_matches`, use it with `async for` and call
+    :meth:`close` if you stop early, so pages still in flight are cancelled.
+    """
+    __slots__ = ['semaphore']
+
+    def __init__(self, client, params, prefetch=4, concurrency=4):
+        super().__init__(client, params, prefetch, concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def __repr__(self):
+        return "<AsyncMatchPrefetcher: offset={} in_flight={}>".format(self.next_offset, len(self.pending))
+
+    async def _fetch(self, params):
+        async with self.semaphore:
+            try:
+                links, matches = await self.client.fetch_matches(self.url, params=params)
+            except NotFoundException:
+                return []
+        return matches
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.matches:
+            if self.done:
+                await self.close()
+                raise StopAsyncIteration
+            while len(self.pending) < self.prefetch:
+                self.pending.append(asyncio.ensure_future(self._fetch(self._next_params())))
+            try:
+                matches = await self.pending.popleft()
+            except BaseException:
+                await self.close()
+                raise
+            self._page_done(matches)
+        return self.matches.popleft()
+
+    async def close(self):
+        """
+        Cancel any pages still being fetched.
+        """
+        self.done = True
+        pending = list(self.pending)
+        self.pending.clear()
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+class MatchPrefetcher(PrefetcherBase):
+    """
+    Iterator over every match of a *get_matches* query, in order, with up to `prefetch` later
+    pages already being fetched on a pool of `concurrency` threads.
+
+    Returned by :meth:`pybattlerite.Client.prefetch_matches`, call :meth:`close` or use it as a
+    context manager if you stop early.
+    """
+    __slots__ = ['executor']
+
+    def __init__(self, client, params, prefetch=4, concurrency=4):
+        super().__init__(client, params, prefetch, concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __repr__(self):
+        return "<MatchPrefetcher: offset={} in_flight={}>".format(self.next_offset, len(self.pending))
+
+    def _fetch(self, params):
+        try:
+            links, matches = self.client.fetch_matches(self.url, params=params)
+        except NotFoundException:
+            return []
+        return matches
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.matches:
+            if self.done:
+                self.close()
+                raise StopIteration
+            while len(self.pending) < self.prefetch:
+                self.pending.append(self.executor.submit(self._fetch, self._next_params()))
+            try:
+                matches = self.pending.popleft().result()
+            except BaseException:
+                self.close()
+                raise
+            self._page_done(matches)
+        return self.matches.popleft()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Cancel pages that have not started and release the worker threads.
+        """
+        self.done = True
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False)
+
+
+class StreamBase:
+    """
+    Shared state for :class:`AsyncMatchStream` and :class:`MatchStream`.
+
+    Only the page being consumed is held, each match is dropped once it has been yielded.
+    :attr:`offset` is the offset of the next match to be yielded, pass it back as `offset` to
+    resume a stream, or pass :attr:`next_url` as `cursor` to resume from the next page.
+    """
+    __slots__ = ['client', 'url', 'params', 'matches', 'offset', 'next_url']
+
+    def __init__(self, client, params, cursor=None):
+        self.client = client
+        self.matches = collections.deque()
+        if cursor:
+            self.url = cursor
+            self.params = None
+            offset = parse_qs(urlparse(cursor)[4]).get('page[offset]')
+            self.offset = int(offset[0]) if offset else 0
+        else:
+            self.url = "{}matches".format(client.base_url)
+            self.params = params
+            self.offset = params.get('page[offset]') or 0
+        self.next_url = self.url
+
+    def __repr__(self):
+        return "<{}: offset={} buffered={}>".format(type(self).__name__, self.offset, len(self.matches))
+
+    def _page(self, links, matches):
+        if links is None:
+            self.url = None
+        else:
+            self.matches.extend(matches)
+            self.url = links.get('next')
+            self.params = None
+        self.next_url = self.url
+
+    def _pop(self):
+        self.offset += 1
+        return self.matches.popleft()
+
+
+class AsyncMatchStream(StreamBase):
+    """
+    Async iterator over every match of a *get_matches* query that follows `links.next`.
+
+    Returned by :meth:`pybattlerite.AsyncClient.iter_matches`.
+    """
+    __slots__ = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.matches:
+            if self.url is None:
+                raise StopAsyncIteration
+            try:
+                links, matches = await self.client.fetch_matches(self.url, params=self.params)
+            except NotFoundException:
+                links = matches = None
+            self._page(links, matches)
+        return self._pop()
+
+
+class MatchStream(StreamBase):
+    """
+    Iterator over every match of a *get_matches* query that follows `links.next`.
+
+    Returned by :meth:`pybattlerite.Client.iter_matches`.
+    """
+    __slots__ = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.matches:
+            if self.url is None:
+                raise StopIteration
+            try:
+                links, matches = self.client.fetch_matches(self.url, params=self.params)
+            except NotFoundException:
+                links = matches = None
+            self._page(links, matches)
+        return self._pop()
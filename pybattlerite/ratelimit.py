@@ -0,0 +1,253 @@
+import asyncio
+import math
+import threading
+import time
+
+
+def _reset_seconds(value, now=None):
+    """
+    Seconds until a rate limit window resets, from an `X-RateLimit-Reset` header.
+
+    The header is read as an epoch timestamp in seconds, milliseconds or nanoseconds if it is
+    within a day of now in one of those units, otherwise as a duration in nanoseconds (large
+    values) or seconds.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    for scale in (1, 1e3, 1e9):
+        if abs(value / scale - now) < 86400:
+            return max(0.0, value / scale - now)
+    if value > 1e6:
+        return value / 1e9
+    return max(0.0, value)
+
+
+class RateLimiter:
+    """
+    A token bucket that paces requests from every thread and coroutine sharing it.
+
+    With no `rate` the bucket is sized from the API's `X-RateLimit-Limit`, `X-RateLimit-Remaining`
+    and `X-RateLimit-Reset` headers as responses come in, and requests only wait once the API
+    says the current window is used up. A fixed `rate` per `per` seconds can be set as well, the
+    headers then never change it and only hold requests back further when the API's own budget
+    runs out first, requests wait for whichever of the two limits is stricter. Requests over the
+    limit queue until their turn instead of failing, a 429 response holds everything back until
+    the window resets and the request is queued again.
+
+    Pass one instance to several clients to make them share a key's budget.
+
+    Parameters
+    ----------
+    rate : Optional[int]
+        Requests allowed per `per` seconds, learned from response headers if omitted.
+    per : float, Default[60]
+        Length in seconds of the window `rate` applies to. When the bucket is sized from headers
+        this is only used until the API's window length is learned.
+    max_throttled : int, Default[5]
+        How many times a request answered with 429 is queued again before the error is raised.
+
+    Attributes
+    ----------
+    acquired : int
+        Requests let through.
+    throttled : int
+        429 responses seen.
+    total_wait : float
+        Seconds requests spent queued, summed.
+    max_wait : float
+        Longest time a single request was queued.
+    """
+    def __init__(self, rate: int=None, per: float=60.0, max_throttled: int=5):
+        self.capacity = rate
+        self.tokens = None if rate is None else float(rate)
+        self.fill_rate = None if rate is None else rate / per
+        self.period = per
+        self.max_throttled = max_throttled
+        self.fixed = rate is not None
+        # With a fixed rate, what the API says is left of its window, counted down as requests go out
+        self.remaining = None
+        self.reset_at = None
+        # Longest time left in a window seen in X-RateLimit-Reset, the least the window can be
+        self.longest_reset = 0.0
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<RateLimiter: tokens={0.tokens} capacity={0.capacity} waiting={0.waiting}>".format(self)
+
+    @property
+    def queue_depth(self):
+        """
+        Number of requests currently queued.
+        """
+        return self.waiting
+
+    def metrics(self):
+        """
+        Returns
+        -------
+        dict
+            `queue_depth`, `acquired`, `throttled`, `total_wait`, `max_wait` and `mean_wait`.
+        """
+        return {'queue_depth': self.waiting, 'acquired': self.acquired, 'throttled': self.throttled,
+                'total_wait': self.total_wait, 'max_wait': self.max_wait,
+                'mean_wait': self.total_wait / self.acquired if self.acquired else 0.0}
+
+    def _refill(self, now):
+        if self.fixed:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            if self.reset_at is not None and now >= self.reset_at:
+                # The API's window is over, its next response says what is left of the new one
+                self.remaining = None
+                self.reset_at = None
+            self.updated = now
+            return
+        if self.tokens is None:
+            return
+        while self.reset_at is not None and now >= self.reset_at:
+            if not self.capacity:
+                # The budget was never learned, let requests through again until the API says otherwise
+                self.tokens = None
+                self.reset_at = None
+                break
+            # A new window, queued reservations use up its budget first
+            self.tokens = min(self.capacity, self.tokens + self.capacity)
+            self.reset_at = self.reset_at + self.period if self.tokens < 0 else None
+        self.updated = now
+
+    def _reserve(self):
+        """
+        Take a token and return how long to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.acquired += 1
+            if self.fixed:
+                return self._reserve_fixed(now)
+            if self.tokens is None:
+                return 0.0
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            deficit = -self.tokens
+            if self.reset_at is not None and self.capacity:
+                wait = self.reset_at - now + (math.ceil(deficit / self.capacity) - 1) * self.period
+            elif self.reset_at is not None:
+                # Throttled without a known budget, only wait out the retry window
+                wait = self.reset_at - now
+            else:
+                wait = self.period
+            self.waiting += 1
+            return wait
+
+    def _reserve_fixed(self, now):
+        self.tokens -= 1
+        wait = -self.tokens / self.fill_rate if self.tokens < 0 else 0.0
+        if self.remaining is not None:
+            self.remaining -= 1
+            if self.remaining < 0 and self.reset_at is not None:
+                # The API's budget ran out before ours, the stricter limit wins
+                wait = max(wait, self.reset_at - now)
+        if wait > 0:
+            self.waiting += 1
+        return wait
+
+    def _waited(self, wait):
+        with self._lock:
+            self.waiting -= 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def acquire(self):
+        """
+        Block the calling thread until a request may be sent.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._waited(wait)
+
+    async def acquire_async(self):
+        """
+        Wait, without blocking the event loop, until a request may be sent.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._waited(wait)
+
+    def update(self, headers):
+        """
+        Adjust the bucket to a response's rate limit headers.
+        """
+        limit = headers.get('X-RateLimit-Limit')
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = _reset_seconds(headers.get('X-RateLimit-Reset'))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.fixed:
+                self._update_fixed(now, remaining, reset)
+                return
+            if limit is not None:
+                try:
+                    self.capacity = int(limit)
+                except ValueError:
+                    pass
+            if remaining is not None:
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    remaining = None
+            if remaining is not None:
+                self.tokens = remaining if self.tokens is None else min(self.tokens, remaining)
+            if reset is not None:
+                # Time left in the current window, not its length
+                self.reset_at = now + reset
+                if reset > self.longest_reset:
+                    self.longest_reset = reset
+                    self.period = reset
+
+    def _update_fixed(self, now, remaining, reset):
+        # The configured rate stays as it is, the headers only track the API's own budget
+        try:
+            remaining = None if remaining is None else float(remaining)
+        except ValueError:
+            remaining = None
+        if remaining is not None:
+            self.remaining = remaining if self.remaining is None else min(self.remaining, remaining)
+        if reset is not None:
+            self.reset_at = now + reset
+
+    def throttle(self, headers):
+        """
+        Record a 429 response, nothing more is let through until the window resets, or for a
+        second if the response doesn't say when that is.
+
+        The clients count how often a request was throttled and stop queueing it again after
+        `max_throttled` times.
+        """
+        reset = _reset_seconds(headers.get('X-RateLimit-Reset'))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            if self.fixed:
+                self.remaining = min(self.remaining or 0.0, 0.0)
+                self.reset_at = now + (reset if reset is not None else 1 / self.fill_rate)
+                return
+            self.tokens = min(self.tokens or 0.0, 0.0)
+            self.reset_at = now + (reset if reset is not None else 1.0)
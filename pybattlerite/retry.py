@@ -0,0 +1,84 @@
+import random
+import time
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request.
+
+    Connection errors, timeouts and responses with a status in `retry_on` are retried with
+    exponential backoff, `backoff * 2 ** attempt` seconds capped at `max_backoff`. With `jitter`
+    the actual wait is picked uniformly between 0 and that, so clients that failed together
+    don't retry together. Every API request is a GET, so retrying is always safe.
+
+    Parameters
+    ----------
+    max_attempts : int, Default[4]
+        Attempts per request including the first one, 1 disables retrying.
+    backoff : float, Default[0.5]
+        Base wait in seconds.
+    max_backoff : float, Default[30]
+        Longest wait between two attempts.
+    jitter : bool, Default[True]
+    retry_on : set(int), Default[{500, 502, 503, 504}]
+        Response statuses worth retrying.
+    deadline : Optional[float], Default[120]
+        Give up once a retry would end later than this many seconds after the first attempt.
+    on_retry : Optional[callable]
+        Called as `on_retry(attempt, delay, status, error)` before each retry, `attempt` is the
+        number of the upcoming attempt starting at 2 and either `status` or `error` is set.
+    """
+    def __init__(self, max_attempts: int=4, backoff: float=0.5, max_backoff: float=30.0, jitter: bool=True,
+                 retry_on=RETRY_STATUSES, deadline: float=120.0, on_retry=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = frozenset(retry_on)
+        self.deadline = deadline
+        self.on_retry = on_retry
+
+    def __repr__(self):
+        return "<RetryPolicy: max_attempts={0.max_attempts} backoff={0.backoff} deadline={0.deadline}>".format(self)
+
+    def delay(self, attempt):
+        """
+        Seconds to wait after the `attempt` th failed attempt, counting from 0.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def retry_delay(self, attempt, started, status=None, error=None):
+        """
+        Decide whether to retry a failed attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of attempts that failed before this one, counting from 0.
+        started : float
+            :func:`time.monotonic` time of the first attempt.
+        status : Optional[int]
+            Status of the response, if one was received.
+        error : Optional[Exception]
+            The connection error or timeout, if no response was received.
+
+        Returns
+        -------
+        Optional[float]
+            Seconds to wait before retrying, or `None` to give up.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if error is None and status not in self.retry_on:
+            return None
+        delay = self.delay(attempt)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        if self.on_retry is not None:
+            self.on_retry(attempt + 2, delay, status, error)
+        return delay
@@ -0,0 +1,615 @@
+import array
+import asyncio
+import codecs
+import collections
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from .errors import BRRequestException, BRServerException, NotFoundException
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def raise_for_status(response):
+    """
+    Raise the :class:`pybattlerite.errors.BRRequestException` matching an error response to a
+    telemetry download, from `requests` or `aiohttp`, the same way the clients map API errors.
+    """
+    try:
+        status = response.status
+    except AttributeError:
+        status = response.status_code
+    if 300 > status >= 200:
+        return
+    if status == 404:
+        raise NotFoundException(response, {})
+    if status > 500:
+        raise BRServerException(response, {})
+    raise BRRequestException(response, {})
+
+
+class TelemetryStore:
+    """
+    An on-disk store for raw match telemetry.
+
+    Telemetry is saved gzip-compressed under the SHA-256 of its `telemetry_url`, so one file per
+    match, and is evicted least recently used first once the store grows past `max_bytes`. Files
+    are written with atomic renames and reads refresh their modification time, so any number of
+    processes on a host can share one directory.
+
+    The store's size is kept in memory between writes and the directory is only walked to evict,
+    once that size crosses `max_bytes`, or every :attr:`rescan_every` writes to notice what other
+    processes wrote.
+
+    Parameters
+    ----------
+    path : str
+        Directory to keep telemetry in, it is created if it doesn't exist.
+    max_bytes : int, Default[2 GiB]
+        Maximum size of the compressed telemetry kept.
+
+    Attributes
+    ----------
+    hits : int
+        Reads served from disk by this process.
+    misses : int
+        Reads by this process that had to be downloaded.
+    """
+    rescan_every = 256
+
+    def __init__(self, path, max_bytes=2 * 1024 ** 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Bytes stored as of the last walk plus what this process wrote since, None before the first walk
+        self._size = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return "<TelemetryStore: path={0.path!r} hits={0.hits} misses={0.misses}>".format(self)
+
+    def _file(self, url):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest[:2], digest + '.json.gz')
+
+    def open(self, url):
+        """
+        Open the stored telemetry for `url` for reading.
+
+        Returns
+        -------
+        Optional[file object]
+            A binary file of the decompressed telemetry, or `None` if it isn't stored.
+        """
+        path = self._file(url)
+        try:
+            f = gzip.open(path, 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return f
+
+    def get(self, url):
+        """
+        Returns
+        -------
+        Optional[bytes]
+            The stored raw telemetry for `url`, or `None` if it isn't stored.
+        """
+        f = self.open(url)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def put(self, url, raw):
+        """
+        Store raw telemetry for `url`, evicting old telemetry if the store is over its size limit.
+        """
+        path = self._file(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(raw))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._stored(path)
+
+    def _stored(self, path):
+        # Files replaced by a write are counted twice until the next walk, evicting a little early
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = 0
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += size
+            walk = self._size is None or self._size > self.max_bytes or self._writes >= self.rescan_every
+        if walk:
+            self.evict()
+
+    def writer(self, url):
+        """
+        A file to stream raw telemetry for `url` into, it is stored when closed with `close()`
+        and discarded when closed with `close(error=True)`.
+        """
+        return _StoreWriter(self, url)
+
+    def size(self):
+        """
+        Returns
+        -------
+        int
+            Size in bytes of all the stored telemetry.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if not name.endswith('.json.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        """
+        Delete least recently used telemetry until the store is within `max_bytes`.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+            self._writes = 0
+
+
+class _StoreWriter:
+    __slots__ = ['store', 'path', 'tmp', 'raw', 'file']
+
+    def __init__(self, store, url):
+        self.store = store
+        self.path = store._file(url)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self.tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        self.raw = os.fdopen(fd, 'wb')
+        self.file = gzip.GzipFile(fileobj=self.raw, mode='wb')
+
+    def write(self, chunk):
+        self.file.write(chunk)
+
+    def close(self, error=False):
+        if self.file is None:
+            return
+        self.file.close()
+        self.raw.close()
+        self.file = None
+        if error:
+            os.remove(self.tmp)
+        else:
+            os.replace(self.tmp, self.path)
+            self.store._stored(self.path)
+
+
+class TelemetryParser:
+    """
+    Incremental parser for a telemetry document, a JSON array of events.
+
+    Feed it the document in chunks of bytes as they arrive and it returns the events completed by
+    each chunk, so only the event being read is ever buffered.
+
+    Parameters
+    ----------
+    types : Optional[list(str)]
+        Only return events whose `type` is one of these, e.g. `'Structures.DeathEvent'`.
+    """
+    __slots__ = ['types', 'buffer', 'state', 'decoder', 'text']
+
+    # Parser states
+    START, VALUE, FIRST_VALUE, SEPARATOR, END = range(5)
+
+    def __init__(self, types=None):
+        self.types = set(types) if types else None
+        self.buffer = ''
+        self.state = self.START
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder('utf-8')()
+
+    def feed(self, chunk):
+        """
+        Parse the next chunk of the document.
+
+        Parameters
+        ----------
+        chunk : bytes
+
+        Returns
+        -------
+        list(dict)
+            The events completed by this chunk.
+        """
+        buf = self.buffer + self.text.decode(chunk)
+        pos = 0
+        events = []
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+            if self.state == self.START:
+                if char != '[':
+                    raise ValueError("Telemetry should be a JSON array, found {!r}".format(char))
+                self.state = self.FIRST_VALUE
+                pos += 1
+            elif self.state == self.SEPARATOR or (self.state == self.FIRST_VALUE and char == ']'):
+                if char == ']':
+                    self.state = self.END
+                elif char != ',':
+                    raise ValueError("Expected ',' or ']' in telemetry, found {!r}".format(char))
+                else:
+                    self.state = self.VALUE
+                pos += 1
+            elif self.state == self.END:
+                raise ValueError("Unexpected data after the end of the telemetry array")
+            else:
+                try:
+                    event, end = self.decoder.raw_decode(buf, pos)
+                except ValueError:
+                    # The event isn't complete yet
+                    break
+                if not isinstance(event, (dict, list)):
+                    # A bare number may continue in the next chunk, e.g. "-3." then "0", it is only
+                    # complete once the separator or the end of the array follows it
+                    after = _WHITESPACE.match(buf, end).end()
+                    if after >= len(buf) or buf[after] not in ',]':
+                        break
+                pos = end
+                self.state = self.SEPARATOR
+                if self.types is None or (isinstance(event, dict) and event.get('type') in self.types):
+                    events.append(event)
+        self.buffer = buf[pos:]
+        return events
+
+    def close(self):
+        """
+        Check that the whole document was parsed.
+
+        Raises
+        ------
+        ValueError
+            The document ended early or wasn't valid.
+        """
+        rest = self.buffer + self.text.decode(b'', final=True)
+        if self.state != self.END or rest.strip():
+            raise ValueError("Telemetry ended before the end of its array")
+
+
+async def _offload(func, *args, **kwargs):
+    """
+    Run blocking store I/O, reads, writes, gzip and eviction, on the loop's default executor.
+    """
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+class AsyncTelemetryStream:
+    """
+    Async iterator over the events of a telemetry document, parsed as its chunks arrive.
+
+    Returned by :meth:`pybattlerite.models.AsyncMatch.iter_telemetry`, call :meth:`close` if you
+    stop early so the response is released. Without a `session` one is opened for the download
+    and closed with the stream. Reading and writing the store happens off the event loop.
+    """
+    __slots__ = ['url', 'session', 'parser', 'store', 'chunk_size', 'events', 'source', 'writer', 'response',
+                 'owns_session']
+
+    def __init__(self, url, session, types=None, store=None, chunk_size=65536):
+        self.url = url
+        self.session = session
+        self.parser = TelemetryParser(types)
+        self.store = store
+        self.chunk_size = chunk_size
+        self.events = collections.deque()
+        self.source = None
+        self.writer = None
+        self.response = None
+        self.owns_session = session is None
+
+    def __repr__(self):
+        return "<AsyncTelemetryStream: url={!r}>".format(self.url)
+
+    def __aiter__(self):
+        return self
+
+    async def _read(self):
+        if self.source is None and self.response is None:
+            if self.store is not None:
+                self.source = await _offload(self.store.open, self.url)
+            if self.source is None:
+                if self.session is None:
+                    import aiohttp
+                    self.session = aiohttp.ClientSession()
+                self.response = await self.session.get(self.url, headers={'Accept': 'application/json'})
+                # An error body would only fail in the parser, and must not reach the store
+                raise_for_status(self.response)
+                if self.store is not None:
+                    self.writer = await _offload(self.store.writer, self.url)
+        if self.source is not None:
+            return await _offload(self.source.read, self.chunk_size)
+        chunk = await self.response.content.read(self.chunk_size)
+        if self.writer is not None:
+            await _offload(self.writer.write, chunk)
+        return chunk
+
+    async def __anext__(self):
+        try:
+            while not self.events:
+                chunk = await self._read()
+                if not chunk:
+                    self.parser.close()
+                    await self.close()
+                    raise StopAsyncIteration
+                self.events.extend(self.parser.feed(chunk))
+        except StopAsyncIteration:
+            raise
+        except BaseException:
+            await self.close(error=True)
+            raise
+        return self.events.popleft()
+
+    async def close(self, error=None):
+        """
+        Release the response or stored file, telemetry being saved to the store is only kept if
+        the whole document was read.
+        """
+        if error is None:
+            error = self.parser.state != TelemetryParser.END
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            await _offload(writer.close, error=error)
+        if self.response is not None:
+            self.response.release()
+            self.response = None
+        if self.source is not None:
+            source, self.source = self.source, None
+            await _offload(source.close)
+        if self.owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class TelemetryEvent:
+    """
+    A telemetry event, see :func:`parse_event` to get the right subclass for an event's type.
+
+    Events of types without a subclass of their own are plain :class:`TelemetryEvent` objects.
+
+    Attributes
+    ----------
+    type : str
+        The event's type, e.g. `'Structures.DeathEvent'`.
+    cursor : int
+        The event's position in the telemetry.
+    time : Optional[int]
+        When the event happened.
+    data : dict
+        The event's raw `dataObject`, including fields that aren't attributes.
+    """
+    __slots__ = ['type', 'cursor', 'time', 'data']
+    # Attribute name -> dataObject key, set by subclasses
+    fields = {}
+
+    def __init__(self, event):
+        self.type = event.get('type')
+        self.cursor = event.get('cursor')
+        self.data = event.get('dataObject') or {}
+        self.time = self.data.get('time')
+        for attr, key in self.fields.items():
+            setattr(self, attr, self.data.get(key))
+
+    def __repr__(self):
+        return "<{0.__class__.__name__}: type={0.type} cursor={0.cursor} time={0.time}>".format(self)
+
+
+class MatchStartEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'map_id', 'match_type', 'team_size', 'region']
+    fields = {'match_id': 'matchID', 'map_id': 'mapID', 'match_type': 'type', 'team_size': 'teamSize',
+              'region': 'region'}
+
+
+class MatchReservedUserEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'account_id', 'character', 'team', 'league', 'division']
+    fields = {'match_id': 'matchID', 'account_id': 'accountId', 'character': 'character', 'team': 'team',
+              'league': 'league', 'division': 'division'}
+
+
+class RoundFinishedEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'round', 'round_length', 'winning_team']
+    fields = {'match_id': 'matchID', 'round': 'round', 'round_length': 'roundLength',
+              'winning_team': 'winningTeam'}
+
+
+class MatchFinishedEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'match_length', 'team_one_score', 'team_two_score']
+    fields = {'match_id': 'matchID', 'match_length': 'matchLength', 'team_one_score': 'teamOneScore',
+              'team_two_score': 'teamTwoScore'}
+
+
+class UserRoundSpellEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'account_id', 'round', 'character', 'spell_type', 'value']
+    fields = {'match_id': 'matchID', 'account_id': 'accountId', 'round': 'round', 'character': 'character',
+              'spell_type': 'type', 'value': 'value'}
+
+
+class DeathEvent(TelemetryEvent):
+    __slots__ = ['match_id', 'user_id', 'killers']
+    fields = {'match_id': 'matchID', 'user_id': 'userID', 'killers': 'killers'}
+
+
+event_classes = {
+    'Structures.MatchStart': MatchStartEvent,
+    'Structures.MatchReservedUser': MatchReservedUserEvent,
+    'Structures.RoundFinishedEvent': RoundFinishedEvent,
+    'Structures.MatchFinishedEvent': MatchFinishedEvent,
+    'Structures.UserRoundSpell': UserRoundSpellEvent,
+    'Structures.DeathEvent': DeathEvent
+}
+
+
+def parse_event(event):
+    """
+    Build the :class:`TelemetryEvent` subclass registered in :data:`event_classes` for an event's type.
+
+    Parameters
+    ----------
+    event : dict
+        A raw telemetry event, as yielded by `iter_telemetry` or found in `get_telemetry`'s result.
+
+    Returns
+    -------
+    :class:`TelemetryEvent`
+    """
+    return event_classes.get(event.get('type'), TelemetryEvent)(event)
+
+
+# Integers up to this size are exact as a double
+_FLOAT_EXACT = 2 ** 53
+
+
+class _Table:
+    __slots__ = ['rows', 'columns']
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def add(self, row):
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = array.array('d', [float('nan')]) * self.rows
+            if isinstance(column, array.array):
+                if value is None:
+                    value = float('nan')
+                elif not isinstance(value, (int, float)):
+                    # Not numeric after all, keep this column as a list
+                    column = self.columns[name] = [None if v != v else v for v in column]
+                elif isinstance(value, int) and not -_FLOAT_EXACT <= value <= _FLOAT_EXACT:
+                    # An integer a double can't hold exactly, like a 64-bit id, keep the column's
+                    # integers exact in a list, the ones before it were small enough to round-trip
+                    column = self.columns[name] = [None if v != v else int(v) if v.is_integer() else v
+                                                   for v in column]
+            column.append(value)
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(float('nan') if isinstance(column, array.array) else None)
+
+
+class TelemetryColumns:
+    """
+    Columnar storage for telemetry events, one table per event type.
+
+    Each table has a `cursor` column and one column per scalar field of its events' `dataObject`.
+    Numeric fields are kept in `array('d')` columns with NaN for missing values, other fields and
+    integers too large to be exact as a float, like 64-bit ids, in lists with `None`. Nested lists and objects are left out. Events are added one at a time, so
+    this can consume :meth:`pybattlerite.models.Match.iter_telemetry` without ever holding the
+    raw events.
+
+    Parameters
+    ----------
+    events : Optional[iterable]
+        Raw event dicts or :class:`TelemetryEvent` objects to add.
+    """
+    __slots__ = ['tables']
+
+    def __init__(self, events=None):
+        self.tables = {}
+        if events is not None:
+            self.extend(events)
+
+    def __repr__(self):
+        return "<TelemetryColumns: {}>".format(', '.join('{}={}'.format(name, table.rows)
+                                                          for name, table in self.tables.items()))
+
+    def add(self, event):
+        """
+        Add an event, a raw dict or a :class:`TelemetryEvent`.
+        """
+        if isinstance(event, TelemetryEvent):
+            _type, cursor, data = event.type, event.cursor, event.data
+        else:
+            _type, cursor, data = event.get('type'), event.get('cursor'), event.get('dataObject') or {}
+        row = {'cursor': cursor}
+        for key, value in data.items():
+            if value is None or isinstance(value, (str, int, float)):
+                row[key] = value
+        table = self.tables.get(_type)
+        if table is None:
+            table = self.tables[_type] = _Table()
+        table.add(row)
+
+    def extend(self, events):
+        for event in events:
+            self.add(event)
+
+    def columns(self, _type):
+        """
+        Returns
+        -------
+        dict
+            Column name to `array('d')` or `list` for one event type.
+        """
+        return self.tables[_type].columns
+
+    def to_numpy(self):
+        """
+        Convert every table to NumPy arrays, numeric columns become `float64` arrays and the
+        rest object arrays. Requires NumPy.
+
+        Returns
+        -------
+        dict
+            Event type to a dict of column name to `numpy.ndarray`.
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("TelemetryColumns.to_numpy requires NumPy, install it with 'pip install numpy'")
+        return {_type: {name: numpy.frombuffer(column, dtype=numpy.float64).copy()
+                        if isinstance(column, array.array) else numpy.array(column, dtype=object)
+                        for name, column in table.columns.items()}
+                for _type, table in self.tables.items()}
@@ -1,20 +1,289 @@
+import collections
+import datetime
 import json
+import mmap
 import os
+import pickle
+import re
+import struct
+import tempfile
+import threading
 
+from collections.abc import Mapping
 from configparser import ConfigParser
 
+DATA_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
+COMPILED_DIR = os.path.join(DATA_DIR, 'compiled')
+SOURCES = ['stackables.json', 'gameplay.json'] + sorted(
+    'localization/{}'.format(name) for name in os.listdir(os.path.join(DATA_DIR, 'localization'))
+    if name.endswith('.ini'))
+
+# Bumped whenever the shape of the compiled data changes, stale bundles are then ignored
+_BUNDLE_VERSION = 1
+
+# String table layout: header (magic, version, count), `count` index records sorted by key
+# (key padded to 32 bytes, value offset, value length), then the UTF-8 value pool
+_STRTAB_MAGIC = b'BRLOCTAB'
+_STRTAB_HEADER = struct.Struct('<8sII')
+_STRTAB_RECORD = struct.Struct('<32sII')
+
+
+# The only timestamp format the API reads and writes
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_ISO_RE = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)Z\Z', re.ASCII)
+_UTC = datetime.timezone.utc
+
+
+def parse_iso(value):
+    """
+    Parse a `'%Y-%m-%dT%H:%M:%SZ'` timestamp, several times faster than :func:`datetime.datetime.strptime`.
+
+    Parameters
+    ----------
+    value : str
+        Example: `'2018-01-09T21:56:33Z'`
+
+    Returns
+    -------
+    datetime.datetime
+        A timezone-aware datetime in UTC.
+
+    Raises
+    ------
+    ValueError
+        The value isn't a valid timestamp in that format.
+    """
+    match = _ISO_RE.match(value)
+    if match is None:
+        raise ValueError("{!r} does not match format '{}'".format(value, ISO_FORMAT))
+    year, month, day, hour, minute, second = map(int, match.groups())
+    return datetime.datetime(year, month, day, hour, minute, second, tzinfo=_UTC)
+
+
+def as_utc(value):
+    """
+    Convert a datetime to UTC, naive datetimes are taken to be in UTC already.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=_UTC)
+    return value.astimezone(_UTC)
+
+
+def format_iso(value):
+    """
+    Format a datetime as a `'%Y-%m-%dT%H:%M:%SZ'` timestamp in UTC, see :func:`as_utc`.
+    """
+    value = as_utc(value)
+    return '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z'.format(value.year, value.month, value.day,
+                                                               value.hour, value.minute, value.second)
+
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+
+def _json_backends():
+    backends = collections.OrderedDict()
+    try:
+        import orjson
+        backends['orjson'] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        backends['ujson'] = ujson.loads
+    except ImportError:
+        pass
+    backends['json'] = _stdlib_loads
+    return backends
+
+
+JSON_BACKENDS = _json_backends()
+
+
+def get_json_loads(backend=None):
+    """
+    Return a JSON decoding function.
+
+    Parameters
+    ----------
+    backend : Optional[str or callable]
+        `'orjson'`, `'ujson'` or `'json'`, or a function taking `bytes` or `str` and returning the
+        decoded document. The fastest installed backend is used if this is omitted, in that order.
+
+    Returns
+    -------
+    callable
+    """
+    if backend is None:
+        return next(iter(JSON_BACKENDS.values()))
+    if callable(backend):
+        return backend
+    try:
+        return JSON_BACKENDS[backend]
+    except KeyError:
+        raise ValueError("JSON backend {!r} is not available, installed backends are: {}".format(
+            backend, ', '.join(JSON_BACKENDS))) from None
+
+
+# Decodes `bytes` or `str` with the fastest installed backend
+json_loads = get_json_loads()
+
 
 class StackableFinder:
-    def __init__(self):
-        _dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data', 'stackables.json')
-        with open(_dir) as f:
-            self.data = json.load(f)
+    """
+    Look up stackable mappings by their `StackableId`.
+
+    The mappings are read from `data/stackables.json` once per process and indexed by id,
+    use :meth:`shared` to get the process-wide instance instead of building a new one.
+    """
+    _shared = None
+    _lock = threading.Lock()
+
+    def __init__(self, data=None):
+        if data is None:
+            data = load_data('stackables.json')
+        self.data = data
+        self.index = {}
+        for item in data["Mappings"]:
+            self.index.setdefault(item["StackableId"], item)
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the process-wide :class:`StackableFinder`, loading it on first use.
+        """
+        if cls._shared is None:
+            with cls._lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
 
     def find(self, _id):
-        for item in self.data["Mappings"]:
-            if item["StackableId"] == int(_id):
-                return item
-        return None
+        """
+        Find the mapping for a stackable id.
+
+        Parameters
+        ----------
+        _id : int or str
+            A `StackableId`, player stat keys can be passed as they are.
+
+        Returns
+        -------
+        Optional[dict]
+            The mapping for this id, or `None` if there is no such stackable.
+        """
+        return self.index.get(int(_id))
+
+
+def _load_source(path):
+    if path.endswith('.ini'):
+        return _read_loc(path)
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def load_data(name):
+    """
+    Load one of the bundled data files.
+
+    The precompiled copy written by :func:`compile_data` is used when it is present and not older
+    than its source, otherwise the source file is parsed.
+
+    Parameters
+    ----------
+    name : str
+        A path relative to the package's `data` directory, one of :data:`SOURCES`.
+        Example: `'stackables.json'` or `'localization/English.ini'`
+
+    Returns
+    -------
+    dict
+        The parsed data, localization files give a dict of `loc_id` to string.
+    """
+    source = os.path.join(DATA_DIR, name)
+    compiled = os.path.join(COMPILED_DIR, name + '.pickle')
+    try:
+        compiled_mtime = os.stat(compiled).st_mtime
+    except OSError:
+        return _load_source(source)
+    try:
+        fresh = compiled_mtime >= os.stat(source).st_mtime
+    except OSError:
+        fresh = True
+    if fresh:
+        try:
+            with open(compiled, 'rb') as f:
+                version, data = pickle.load(f)
+            if version == _BUNDLE_VERSION:
+                return data
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+    return _load_source(source)
+
+
+def compile_data(dest=None):
+    """
+    Precompile the bundled data files so they load with next to no parsing.
+
+    This runs as part of `setup.py build_py`, call it directly to compile an existing install.
+
+    Parameters
+    ----------
+    dest : Optional[str]
+        Directory to write to, defaults to the package's `data/compiled` directory.
+
+    Returns
+    -------
+    list(str)
+        Paths of the written files.
+    """
+    dest = dest or COMPILED_DIR
+    written = []
+    for name in SOURCES:
+        path = os.path.join(dest, name + '.pickle')
+        data = _load_source(os.path.join(DATA_DIR, name))
+        _write_atomic(path, pickle.dumps((_BUNDLE_VERSION, data), protocol=4))
+        written.append(path)
+        if name.endswith('.ini'):
+            path = os.path.join(dest, os.path.splitext(name)[0] + '.strtab')
+            write_string_table(data, path)
+            written.append(path)
+    return written
+
+
+def _write_atomic(path, blob):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+def write_string_table(table, path):
+    """
+    Write a dict of `loc_id` to string as a string table readable by :class:`StringTable`.
+
+    Parameters
+    ----------
+    table : dict
+        Keys can be at most 32 bytes long once UTF-8 encoded.
+    path : str
+        Where to write the table, the file is replaced atomically.
+    """
+    keys = sorted(k.encode('utf-8') for k in table)
+    index = []
+    pool = []
+    offset = 0
+    for key in keys:
+        if len(key) > 32:
+            raise ValueError("String table keys can be at most 32 bytes long: {!r}".format(key))
+        value = table[key.decode('utf-8')].encode('utf-8')
+        index.append(_STRTAB_RECORD.pack(key, offset, len(value)))
+        pool.append(value)
+        offset += len(value)
+    header = _STRTAB_HEADER.pack(_STRTAB_MAGIC, _BUNDLE_VERSION, len(keys))
+    _write_atomic(path, header + b''.join(index) + b''.join(pool))
 
 
 class LocParser(ConfigParser):
@@ -27,9 +296,37 @@ class LocParser(ConfigParser):
         return d
 
 
+def _read_loc(path):
+    """
+    Read the `[Loc]` table of a localization file.
+
+    This is a plain line reader rather than :class:`LocParser`, it is several times faster and
+    keeps unindented continuation lines, which some of the shipped files contain, as part of the
+    previous string instead of failing to parse.
+    """
+    table = {}
+    key = None
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            stripped = line.strip()
+            if not stripped or stripped[0] in '#;' or (stripped[0] == '[' and stripped[-1] == ']'):
+                continue
+            k, sep, value = stripped.partition('=')
+            k = k.strip()
+            if sep and k and ' ' not in k:
+                key = k.lower()
+                table[key] = value.strip()
+            elif key is not None:
+                table[key] += '\n' + stripped
+    return table
+
+
 class Localizer:
     """
     Use this to manually localize any data with an available `loc_id`.
+
+    Localization tables are parsed once per language and shared by every :class:`Localizer`,
+    client and model in the process, see :func:`get_localizer` and :func:`preload`.
     
     Parameters
     ----------
@@ -39,13 +336,23 @@ class Localizer:
         `Brazilian, English, French, German, Italian, Japanese, Korean,
         Polish, Romanian, Russian, SChinese, Spanish, Turkish.`
     """
+    _tables = {}
+    _lock = threading.Lock()
+
     def __init__(self, lang):
-        parser = LocParser()
-        _dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data', 'localization',
-                            '{}.ini'.format(lang))
-        with open(_dir) as fp:
-            parser.readfp(fp)
-        self.data = parser.to_dict()['Loc']
+        self.lang = lang
+        self.data = self._table(lang)
+
+    @classmethod
+    def _table(cls, lang):
+        try:
+            return cls._tables[lang]
+        except KeyError:
+            pass
+        with cls._lock:
+            if lang not in cls._tables:
+                cls._tables[lang] = load_data('localization/{}.ini'.format(lang))
+            return cls._tables[lang]
 
     def localize(self, _id):
         """
@@ -64,3 +371,182 @@ class Localizer:
         """
         return self.data[_id]
 
+
+class StringTable(Mapping):
+    """
+    A read-only mapping over a memory-mapped string table written by :func:`write_string_table`.
+
+    Lookups binary search the mapped index and decode only the requested value, so processes
+    mapping the same file share its pages instead of each holding a dict of every string.
+
+    Parameters
+    ----------
+    path : str
+        Path to the string table file.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = _STRTAB_HEADER.unpack_from(self._map, 0)
+        if magic != _STRTAB_MAGIC or version != _BUNDLE_VERSION:
+            self._map.close()
+            raise ValueError("{} is not a compatible string table".format(path))
+        self._pool = _STRTAB_HEADER.size + self._count * _STRTAB_RECORD.size
+
+    def _key(self, i):
+        return _STRTAB_RECORD.unpack_from(self._map, _STRTAB_HEADER.size + i * _STRTAB_RECORD.size)
+
+    def __getitem__(self, _id):
+        key = _id.encode('utf-8')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, offset, length = self._key(mid)
+            found = found.rstrip(b'\x00')
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                start = self._pool + offset
+                return self._map[start:start + length].decode('utf-8')
+        raise KeyError(_id)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._key(i)[0].rstrip(b'\x00').decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+
+def _is_private(path):
+    """
+    Internal function checking that a directory and its parent are owned by the current user and
+    not writable by anyone else, always true where there are no POSIX owners.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    for directory in (path, os.path.dirname(path)):
+        stat = os.stat(directory)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            return False
+    return True
+
+
+class MappedLocalizer(Localizer):
+    """
+    A :class:`Localizer` backed by a memory-mapped :class:`StringTable` instead of a dict.
+
+    The table is taken from the package's compiled data if :func:`compile_data` has run,
+    otherwise it is built once into the user's cache directory, `$XDG_CACHE_HOME/pybattlerite`
+    or `~/.cache/pybattlerite`, that every process of that user shares. A cache directory
+    that isn't owned by the user or is writable by others is never used, the table is then
+    built into a private temporary directory instead.
+
+    Parameters
+    ----------
+    lang : str
+        The language to localise game specific strings in.
+    """
+    _build_lock = threading.Lock()
+    # Used when the user's cache directory can't be, for the rest of the process
+    _private_dir = None
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.data = StringTable(self._table_path(lang))
+
+    @classmethod
+    def _table_path(cls, lang):
+        name = os.path.join('localization', '{}.strtab'.format(lang))
+        source = os.path.join(DATA_DIR, 'localization', '{}.ini'.format(lang))
+        shared = os.path.join(cls._cache_dir(), name)
+        for path in (os.path.join(COMPILED_DIR, name), shared):
+            try:
+                if os.stat(path).st_mtime >= os.stat(source).st_mtime:
+                    return path
+            except OSError:
+                pass
+        with cls._build_lock:
+            write_string_table(load_data('localization/{}.ini'.format(lang)), shared)
+        return shared
+
+    @classmethod
+    def _cache_dir(cls):
+        # Tables are mapped and trusted as they are, so they are only kept where no one else can write
+        if cls._private_dir is not None:
+            return cls._private_dir
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'pybattlerite', str(_BUNDLE_VERSION))
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            if _is_private(path):
+                return path
+        except OSError:
+            pass
+        cls._private_dir = tempfile.mkdtemp(prefix='pybattlerite-')
+        return cls._private_dir
+
+
+_localizers = {}
+_mapped = os.environ.get('PYBATTLERITE_MAPPED_LOCALIZATION', '') not in ('', '0')
+
+
+def use_mapped_localization(enabled=True):
+    """
+    Switch the shared localizers to :class:`MappedLocalizer`.
+
+    Call this once per process before any localization happens, for example in a worker's
+    initializer. It can also be turned on by setting the environment variable
+    `PYBATTLERITE_MAPPED_LOCALIZATION=1`.
+
+    Parameters
+    ----------
+    enabled : bool
+    """
+    global _mapped
+    _mapped = enabled
+
+
+def get_localizer(lang, mapped=None):
+    """
+    Return the shared :class:`Localizer` for a language, loading its table on first use.
+
+    This is safe to call from any thread or coroutine, a language is only ever parsed once.
+
+    Parameters
+    ----------
+    lang : str
+        One of the languages listed in :class:`Localizer`.
+    mapped : Optional[bool]
+        Return a :class:`MappedLocalizer`, defaults to the mode set by :func:`use_mapped_localization`.
+
+    Returns
+    -------
+    :class:`Localizer`
+    """
+    mapped = _mapped if mapped is None else mapped
+    try:
+        return _localizers[lang, mapped]
+    except KeyError:
+        return _localizers.setdefault((lang, mapped), (MappedLocalizer if mapped else Localizer)(lang))
+
+
+def preload(langs=None, mapped=None):
+    """
+    Load localization tables ahead of time, e.g. while a service boots.
+
+    Parameters
+    ----------
+    langs : Optional[list(str)]
+        Languages to load, every available language is loaded if this is omitted.
+    mapped : Optional[bool]
+        Whether to load :class:`MappedLocalizer` tables, see :func:`get_localizer`.
+    """
+    if langs is None:
+        langs = [os.path.splitext(os.path.basename(name))[0] for name in SOURCES if name.endswith('.ini')]
+    elif isinstance(langs, str):
+        langs = [langs]
+    for lang in langs:
+        get_localizer(lang, mapped)
@@ -1,4 +1,20 @@
+import os
+import runpy
+
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPyWithData(build_py):
+    """
+    Precompile the bundled game data next to the built package, see pybattlerite.utils.compile_data
+    """
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            utils = runpy.run_path(os.path.join('pybattlerite', 'utils.py'))
+            utils['compile_data'](os.path.join(self.build_lib, 'pybattlerite', 'data', 'compiled'))
+
 
 setup(
     name="pybattlerite",
@@ -15,8 +31,13 @@ setup(
         "aiohttp",
         "requests"
     ],
+    extras_require={
+        'numpy': ["numpy"],
+        'orjson': ["orjson"]
+    },
     python_requires='>=3.5',
     package_data={
         '': ['data/*.json', 'data/localization/*.ini']
-    }
+    },
+    cmdclass={'build_py': BuildPyWithData}
 )